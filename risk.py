@@ -1,42 +1,167 @@
 import os
 import random
 import sys
-from typing import List, Tuple
+from contextlib import contextmanager, nullcontext
+from typing import Callable, List, Optional, Tuple
 
-import matplotlib
-
-matplotlib.use("TkAgg")
-
-import tkinter as tk
-
-import matplotlib.gridspec as gridspec
-import matplotlib.pyplot as plt
 import networkx as nx
-from matplotlib.collections import LineCollection
-from PIL import Image, ImageTk
+import numpy as np
 
+from src import kernels
+from src.compiled_map import OWNER_DTYPE, TROOPS_DTYPE, classic_map
+from src.game_log import DEBUG, INFO, GameLog
 from src.init_graph import init_graph
-from src.positions import continents, positions
-
-color_map = {
-    0: "white",  # "no owner"
-    1: "red",
-    2: "blue",
-    3: "green",
-    4: "yellow",
-    5: "purple",
-    6: "orange",
-}
+from src.positions import color_map, continent_bonus, continents, positions
+from src.routing import FrontDistances
+from src.threat_map import ThreatMap
+from src.zobrist import classic_zobrist
 
 
 class Board:
     """Create the board with a graph."""
 
-    def __init__(self):
+    def __init__(self, headless: bool = False, analytics=None, log=None):
         self.graph = init_graph()
         self.deck_of_cards = self.fresh_deck_of_cards()
         self.game_turn = 0
+        self.current_player = 0
+        self.cards_traded = {player: 0 for player in range(1, 7)}
+        self.headless = headless
         self.highlighted_country = None
+        self.player_stats = self.calculate_player_stats()
+        self.info_panel_dirty = True
+
+        # Incremental Zobrist hash of owners, troop buckets, cards and the
+        # current player, see src/zobrist.py
+        self.compiled_map = classic_map()
+        self.zobrist = classic_zobrist()
+        self.state_hash = self.compute_state_hash()
+        self.empty_board_hash = self.state_hash
+
+        # Owners and troops by territory id for the kernels of src/kernels.py
+        self.owner_array = np.array(
+            [self.graph.nodes[country]["owner"] for country in self.graph],
+            dtype=OWNER_DTYPE,
+        )
+        self.troop_array = np.array(
+            [self.graph.nodes[country]["troops"] for country in self.graph],
+            dtype=TROOPS_DTYPE,
+        )
+
+        # Enemy troops around every country, see src/threat_map.py
+        self.threat_map = ThreatMap(
+            self.compiled_map,
+            [self.graph.nodes[country]["owner"] for country in self.graph],
+            [self.graph.nodes[country]["troops"] for country in self.graph],
+        )
+        # Hops from own countries to the nearest front, see src/routing.py
+        self.front_distances = FrontDistances(
+            self.compiled_map,
+            [self.graph.nodes[country]["owner"] for country in self.graph],
+        )
+
+        # Optional src.analytics.HeatmapCounters shared across games
+        self.analytics = analytics
+
+        # Game events, printed by default, see src/game_log.py
+        self.log = log or GameLog()
+
+        # Outcome of the last game() and its stalemate tracking, see
+        # game_steps()
+        self.winner = 0
+        self.end_reason = None
+        self.seen_hashes = {}
+        self.last_progress = (0, ())
+
+        # src.anytime.AnytimeAI agents by player, the others play with the
+        # built-in heuristics
+        self.agents = {}
+
+        # Called with the interval of every pause() of a headless board, e.g.
+        # src.pygame_renderer.PygameRenderer.wait to pace a pygame window
+        self.pause_handler = None
+
+        # Observers receive one consolidated change set per committed batch of
+        # mutations, see batch() and commit_changes().
+        self.observers = []
+        self.batch_depth = 0
+        self.pending_changes = {}
+
+        if not self.headless:
+            self.init_figure()
+            self.add_observer(self.render_changes)
+
+    def reset(self, seed=None):
+        """Return to the empty board of a new Board() for another game.
+
+        Everything allocated by __init__ is reused: the graph, the deck, the
+        compiled map and Zobrist keys, the threat and routing tables and, with
+        a GUI, the window and its artists. Agents, observers, analytics and the
+        log are kept. With a seed the global random module is seeded, so that
+        reset(seed) plays the same game as random.seed(seed) on a new Board.
+        """
+        if seed is not None:
+            random.seed(seed)
+        nodes = self.graph.nodes
+        for country in self.graph:
+            node = nodes[country]
+            node["owner"] = 0
+            node["troops"] = 0
+        for card in self.deck_of_cards.values():
+            card["card_owner"] = 0
+        for player in self.cards_traded:
+            self.cards_traded[player] = 0
+        for stats in self.player_stats.values():
+            stats["troops"] = 0
+            stats["territories"] = 0
+        self.game_turn = 0
+        self.current_player = 0
+        self.state_hash = self.empty_board_hash
+        self.owner_array[:] = 0
+        self.troop_array[:] = 0
+        self.threat_map.reset(
+            [0] * self.compiled_map.n_territories,
+            [0] * self.compiled_map.n_territories,
+        )
+        self.front_distances.set_owners([0] * self.compiled_map.n_territories)
+        self.winner = 0
+        self.end_reason = None
+        self.batch_depth = 0
+        self.pending_changes = {}
+        self.info_panel_dirty = True
+
+        if not self.headless:
+            self.reset_artists()
+        # The artists are already up to date, other observers get every country
+        observers = [
+            observer for observer in self.observers if observer != self.render_changes
+        ]
+        if observers:
+            changes = {country: {"owner": 0, "troops": 0} for country in self.graph}
+            for observer in observers:
+                observer(changes)
+
+    def reset_artists(self):
+        """Show the empty board by updating the existing artists in place."""
+        self.clear_highlighted_country()
+        if isinstance(self.edges, list):
+            self.clear_highlighted_edge()
+        self.nodes.set_facecolor(self.get_nodes_colors())
+        for country, label in self.troops.items():
+            label.set_text(str(self.graph.nodes[country]["troops"]))
+        self.refresh_info_panel()
+
+    def init_figure(self):
+        """Create the window, the board background and the graph artists."""
+        # The GUI stack is only imported for boards with a window, so headless
+        # games and the command line start without it
+        import matplotlib
+
+        matplotlib.use("TkAgg")
+        import matplotlib.gridspec as gridspec
+        import matplotlib.pyplot as plt
+        from PIL import Image, ImageTk
+
         self.fig = plt.figure(figsize=(17.06, 7.2))
         gs = gridspec.GridSpec(1, 2, width_ratios=[3, 1], figure=self.fig)
         self.board_ax = plt.subplot(gs[0])
@@ -68,6 +193,19 @@ class Board:
         self.info_ax.axis("off")
         self.fig.canvas.mpl_connect("close_event", self.handle_close)
 
+        # The info panel is a single persistent text artist. Mutations only mark
+        # it dirty; its text is rebuilt at most once per rendered frame.
+        self.info_text = self.info_ax.text(
+            0.14,
+            0.5,
+            "",
+            transform=self.info_ax.transAxes,
+            ha="left",
+            va="center",
+            fontsize=11,
+            family="monospace",
+        )
+
         self.nodes = nx.draw_networkx_nodes(
             self.graph,
             positions,
@@ -100,10 +238,12 @@ class Board:
             font_family="monospace",
             ax=self.board_ax,
         )
-        self.update_info_panel()
+        self.refresh_info_panel()
 
     @staticmethod
     def get_screen_size():
+        import tkinter as tk
+
         root = tk.Tk()
         width = root.winfo_screenwidth()
         height = root.winfo_screenheight()
@@ -147,8 +287,16 @@ class Board:
         ]
         return player_cards
 
+    def set_card_owner(self, card: str, owner: int):
+        previous_owner = self.deck_of_cards[card]["card_owner"]
+        self.state_hash ^= self.zobrist.card_key(
+            card, previous_owner
+        ) ^ self.zobrist.card_key(card, owner)
+        self.deck_of_cards[card]["card_owner"] = owner
+        self.update_info_panel()
+
     def return_card_to_deck(self, card: str):
-        self.deck_of_cards[card]["card_owner"] = 0
+        self.set_card_owner(card, 0)
 
     def return_cards_to_deck(self, cards: list):
         for card in cards:
@@ -175,61 +323,34 @@ class Board:
         if n_cards < 5:
             return 0
 
-        bonus_troops = 0
-        player_has_joker1 = "Joker1" in players_cards
-        player_has_joker2 = "Joker2" in players_cards
-        player_countries = self.get_player_countries(player)
-        player_countries_with_card = []
-        for country in player_countries:
-            if country in players_cards:
-                player_countries_with_card.append(country)
-
-        # Generate all the possible combinations of three cards 3 of the current player
-        possible_combinations = []
-        for i in range(n_cards):
-            for j in range(i + 1, n_cards):
-                for k in range(j + 1, n_cards):
-                    possible_combinations.append(
-                        (players_cards[i], players_cards[j], players_cards[k])
-                    )
-
-        possible_combinations_bonus = {}
-        # Go through all the possible combinations and check their corresponding troop bonuses, or absence of bonus (zero)
-        for combination in possible_combinations:
-            bonus_troops = self.calculate_bonus_troops(combination)
-            possible_combinations_bonus[tuple(combination)] = bonus_troops
-        # Sort the possible combinations by the bonus troops
-        sorted_combinations = sorted(
-            possible_combinations_bonus.items(), key=lambda x: x[1], reverse=True
+        card_types = np.array(
+            [self.deck_of_cards[card]["card_type"] for card in players_cards],
+            dtype=np.int8,
+        )
+        i, j, k, bonus_troops = kernels.best_trade(card_types)
+        maximum_bonus_combination = (
+            players_cards[i],
+            players_cards[j],
+            players_cards[k],
         )
-        maximum_bonus = sorted_combinations[0][1]
-        # If the maximum bonus combination has a Joker in it, check if for the same bonus there is a combination without the Joker
-        same_bonus_combos = [
-            combination
-            for combination, bonus in sorted_combinations
-            if bonus == maximum_bonus
-        ]
-        # Check if there is more than 1 combination with the maximum bonus
-        if len(same_bonus_combos) > 1:
-            if player_has_joker1 or player_has_joker2:
-                for combination in same_bonus_combos:
-                    if "Joker1" in combination or "Joker2" in combination:
-                        same_bonus_combos.remove(combination)
-            if same_bonus_combos:
-                maximum_bonus_combination = same_bonus_combos[0]
-            else:
-                maximum_bonus_combination = random.choice(same_bonus_combos)
-        else:
-            maximum_bonus_combination = sorted_combinations[0][0]
-
-        for card in maximum_bonus_combination:
-            if card in player_countries_with_card:
-                bonus_troops = self.update_troops(
-                    card, self.graph.nodes[card]["troops"] + 2
-                )
 
-        bonus_troops = possible_combinations_bonus[maximum_bonus_combination]
+        # Traded cards of own countries put 2 troops on them
+        with self.batch():
+            for card in maximum_bonus_combination:
+                if card in self.graph and self.graph.nodes[card]["owner"] == player:
+                    self.update_troops(card, self.graph.nodes[card]["troops"] + 2)
+
+        if self.log.debug_enabled:
+            self.log_event(
+                DEBUG,
+                "trade",
+                "Player {player} traded {cards} for {troops} troops",
+                player=player,
+                cards=list(maximum_bonus_combination),
+                troops=bonus_troops,
+            )
         self.return_cards_to_deck(list(maximum_bonus_combination))
+        self.cards_traded[player] += 1
 
         return bonus_troops
 
@@ -317,20 +438,123 @@ class Board:
 
     def update_troops(self, country, troops):
         """Change the number of troops in a country."""
-        self.graph.nodes[country]["troops"] = troops
-        self.highlight_country(country)
-        self.draw_troops()
+        node = self.graph.nodes[country]
+        if node["owner"] in self.player_stats:
+            self.player_stats[node["owner"]]["troops"] += troops - node["troops"]
+        territory = self.compiled_map.index[country]
+        self.state_hash ^= self.zobrist.territory_key(
+            territory, node["owner"], node["troops"]
+        ) ^ self.zobrist.territory_key(territory, node["owner"], troops)
+        self.threat_map.update_troops(territory, troops)
+        self.troop_array[territory] = troops
+        node["troops"] = troops
         self.update_info_panel()
+        self.record_change(country, "troops", troops)
 
     def update_owner(self, country, owner):
         """Change the owner of a country."""
-        self.graph.nodes[country]["owner"] = owner
-        self.highlight_country(country)
-        self.draw_nodes()
+        node = self.graph.nodes[country]
+        if node["owner"] != owner:
+            if node["owner"] in self.player_stats:
+                self.player_stats[node["owner"]]["troops"] -= node["troops"]
+                self.player_stats[node["owner"]]["territories"] -= 1
+            if owner in self.player_stats:
+                self.player_stats[owner]["troops"] += node["troops"]
+                self.player_stats[owner]["territories"] += 1
+        territory = self.compiled_map.index[country]
+        self.state_hash ^= self.zobrist.territory_key(
+            territory, node["owner"], node["troops"]
+        ) ^ self.zobrist.territory_key(territory, owner, node["troops"])
+        self.threat_map.update_owner(territory, owner)
+        self.front_distances.update_owner(territory, owner)
+        self.owner_array[territory] = owner
+        node["owner"] = owner
         self.update_info_panel()
+        self.record_change(country, "owner", owner)
+
+    def add_observer(self, observer: Callable[[dict], None]):
+        """Subscribe to change sets emitted when mutations are committed."""
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[dict], None]):
+        self.observers.remove(observer)
+
+    @contextmanager
+    def batch(self):
+        """Group mutations so observers receive a single change set.
+
+        Batches can be nested; the change set is emitted when the outermost
+        batch exits.
+
+            with board.batch():
+                board.update_owner("Peru", 2)
+                board.update_troops("Peru", 5)
+        """
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.commit_changes()
+
+    def record_change(self, country: str, attribute: str, value: int):
+        """Record a mutation, committing it right away outside of a batch."""
+        # Re-inserting keeps the most recently changed country last
+        change = self.pending_changes.pop(country, {})
+        change[attribute] = value
+        self.pending_changes[country] = change
+        if self.batch_depth == 0:
+            self.commit_changes()
+
+    def commit_changes(self):
+        """Emit the pending change set, {country: {"owner"/"troops": value}}."""
+        if not self.pending_changes:
+            return
+        changes = self.pending_changes
+        self.pending_changes = {}
+        for observer in self.observers:
+            observer(changes)
+
+    def render_changes(self, changes: dict):
+        """Redraw the board once for a committed change set."""
+        if any("owner" in change for change in changes.values()):
+            self.draw_nodes()
+        if any("troops" in change for change in changes.values()):
+            self.draw_troops()
+        self.highlight_country(list(changes)[-1])
+
+    def get_state(self) -> dict:
+        """Return the game state as plain dicts, e.g. for saving a game."""
+        return {
+            "game_turn": self.game_turn,
+            "current_player": self.current_player,
+            "owner": {node: self.graph.nodes[node]["owner"] for node in self.graph},
+            "troops": self.get_troops_dict(),
+            "card_owner": {
+                card: self.deck_of_cards[card]["card_owner"]
+                for card in self.deck_of_cards
+            },
+        }
+
+    def load_state(self, state: dict):
+        """Restore a state returned by get_state() with a single render."""
+        with self.batch():
+            for country, owner in state["owner"].items():
+                self.update_owner(country, owner)
+            for country, troops in state["troops"].items():
+                self.update_troops(country, troops)
+            for card, owner in state.get("card_owner", {}).items():
+                self.set_card_owner(card, owner)
+            self.game_turn = state.get("game_turn", self.game_turn)
+            self.set_current_player(state.get("current_player", self.current_player))
 
     def highlight_edge(self, edge):
         """Update an edge of the graph."""
+        if self.headless:
+            return
+        from matplotlib.collections import LineCollection
+
         if self.edges:
             if isinstance(self.edges, list):
                 for coll in self.edges:
@@ -387,6 +611,10 @@ class Board:
 
     def highlight_edge_slightly(self, edge):
         """Update an edge of the graph."""
+        if self.headless:
+            return
+        from matplotlib.collections import LineCollection
+
         if self.edges:
             if isinstance(self.edges, list):
                 for coll in self.edges:
@@ -443,6 +671,8 @@ class Board:
 
     def highlight_country(self, country):
         """Highlight a country in the self."""
+        if self.headless:
+            return
         self.clear_highlighted_country()
         self.highlighted_country = nx.draw_networkx_nodes(
             self.graph,
@@ -460,12 +690,18 @@ class Board:
 
     def clear_highlighted_country(self):
         """Clear the highlighted country."""
+        if self.headless:
+            return
         if self.highlighted_country:
             self.highlighted_country.remove()
             self.highlighted_country = None
 
     def clear_highlighted_edge(self):
         """Clear the highlighted edge."""
+        if self.headless:
+            return
+        from matplotlib.collections import LineCollection
+
         if self.edges:
             if isinstance(self.edges, list):
                 for coll in self.edges:
@@ -494,20 +730,31 @@ class Board:
 
     def randomize_board(self):
         """Randomize the number of troops in all countries."""
-        for country in self.graph.nodes:
-            self.randomize_country(country)
+        with self.batch():
+            for country in self.graph.nodes:
+                self.randomize_country(country)
+
+    def populate_initial_board(self, animate: bool = True):
+        """Populate the board with the initial number of troops.
+
+        With animate=False the placements are applied in a single batch and
+        rendered once.
+        """
+        with nullcontext() if animate else self.batch():
+            self._populate_initial_board(animate)
 
-    def populate_initial_board(self):
-        """Populate the board with the initial number of troops."""
+    def _populate_initial_board(self, animate: bool):
         list_of_countries = list(self.graph.nodes)
         random.shuffle(list_of_countries)
 
         # Select one random country for each player to start
         for player in range(1, 7):
             country = list_of_countries[player - 1]
-            self.update_owner(country, player)
-            self.update_troops(country, 1)
-            plt.pause(0.1)
+            with self.batch():
+                self.update_owner(country, player)
+                self.update_troops(country, 1)
+            if animate:
+                self.pause(0.1)
 
         # Keep track of the number of troops for each player
         players_troops = {
@@ -538,21 +785,30 @@ class Board:
                     random.randint(0, len(available_countries) - 1)
                 ]
 
-                if self.graph.nodes[selected_country]["owner"] == 0:
-                    self.update_owner(selected_country, player)
+                with self.batch():
+                    if self.graph.nodes[selected_country]["owner"] == 0:
+                        self.update_owner(selected_country, player)
 
-                self.update_troops(
-                    selected_country, self.graph.nodes[selected_country]["troops"] + 1
-                )
+                    self.update_troops(
+                        selected_country,
+                        self.graph.nodes[selected_country]["troops"] + 1,
+                    )
                 players_troops[player] += 1
-                plt.pause(0.1)
+                if animate:
+                    self.pause(0.1)
 
     def update_info_panel(self):
-        self.info_ax.clear()
-        self.info_ax.axis("off")
-        player_data = self.calculate_player_stats()
+        """Mark the info panel as stale; it is redrawn on the next frame."""
+        self.info_panel_dirty = True
+
+    def refresh_info_panel(self):
+        """Rebuild the info panel text if anything changed since the last frame."""
+        if self.headless:
+            return
+        if not self.info_panel_dirty:
+            return
         info_text = f"\n\nTURN: {self.game_turn}\n\n"
-        for player, data in player_data.items():
+        for player, data in self.player_stats.items():
             info_text += f"{player}. {str(color_map[player]).capitalize()} - Troops: {data['troops']}\nTerritories: {data['territories']}\n"
 
             player_cards = self.get_player_cards(player)
@@ -573,16 +829,19 @@ class Board:
                 last_two_cards = player_cards[3:]
                 info_text += f"Cards: |{first_card}|\n|{'| |'.join(next_two_cards)}|\n|{'| |'.join(last_two_cards)}|\n\n"
 
-        self.info_ax.text(
-            0.14,
-            0.5,
-            info_text,
-            transform=self.info_ax.transAxes,
-            ha="left",
-            va="center",
-            fontsize=11,
-            family="monospace",
-        )
+        self.info_text.set_text(info_text)
+        self.info_panel_dirty = False
+
+    def pause(self, interval: float):
+        """Render a frame, flushing the info panel first if it is dirty."""
+        if self.headless:
+            if self.pause_handler is not None:
+                self.pause_handler(interval)
+            return
+        self.refresh_info_panel()
+        import matplotlib.pyplot as plt
+
+        plt.pause(interval)
 
     def calculate_player_stats(self):
         """Calculate troops and territories for each player."""
@@ -600,6 +859,15 @@ class Board:
     def path_exists(self, origin: str, destination: str, owner: int) -> bool:
         # nx.has_path(self.graph, origin, destination)
         # Analogous function to has_path but with the owner condition per connection between nodes
+        if kernels.JIT_ENABLED:
+            index = self.compiled_map.index
+            return kernels.path_exists(
+                self.compiled_map.neighbour_table,
+                self.owner_array,
+                index[origin],
+                index[destination],
+                owner,
+            )
         visited = {origin}
         stack = [origin]
         while stack:
@@ -639,6 +907,33 @@ class Board:
         else:
             return [self.dice_roll()]
 
+    def is_peaceful(self, country: str) -> bool:
+        """True if every neighbour of the country has the same owner."""
+        return not self.threat_map.is_frontline(self.compiled_map.index[country])
+
+    def frontline_countries(self, player: int) -> List[str]:
+        """Countries of the player bordering an enemy, most threatened first."""
+        ranked = self.threat_map.rank_frontline(
+            [
+                self.compiled_map.index[country]
+                for country in self.get_player_countries(player)
+            ]
+        )
+        return [self.compiled_map.territories[territory] for territory in ranked]
+
+    def distance_to_front(self, country: str) -> int:
+        """Hops from a country to its owner's nearest front, -1 if cut off."""
+        return self.front_distances.distance(
+            self.graph.nodes[country]["owner"], self.compiled_map.index[country]
+        )
+
+    def toward_front(self, country: str):
+        """The own neighbour one hop closer to the front, None if there is none."""
+        territory = self.front_distances.next_hop(
+            self.graph.nodes[country]["owner"], self.compiled_map.index[country]
+        )
+        return None if territory is None else self.compiled_map.territories[territory]
+
     def get_player_continents(self, player: int) -> List:
         player_countries = self.get_player_countries(player)
         player_continents = []
@@ -653,24 +948,30 @@ class Board:
         player_continents = self.get_player_continents(player)
         if len(player_continents) == 0:
             return bonus_territories
-        bonus_per_continent = {
-            "North America": 5,
-            "South America": 2,
-            "Europe": 5,
-            "Africa": 3,
-            "Asia": 7,
-            "Australia": 2,
-        }
         total_bonus = (
-            sum(bonus_per_continent[continent] for continent in player_continents)
+            sum(continent_bonus[continent] for continent in player_continents)
             + bonus_territories
         )
         return total_bonus
 
     def get_attacks(self, player) -> List[Tuple]:
+        if kernels.JIT_ENABLED and (self.owner_array == player).any():
+            # Pairs in the order of the player's countries and graph.neighbors
+            pairs = kernels.attack_pairs(
+                self.compiled_map.graph_neighbour_table,
+                self.owner_array,
+                self.troop_array,
+                player,
+            )
+            territories = self.compiled_map.territories
+            return [
+                (territories[origin], territories[destination])
+                for origin, destination in pairs.tolist()
+            ]
         player_countries = self.get_player_countries(player)
         if not player_countries:
-            print("No countries to attack from")
+            if self.log.info_enabled:
+                self.log_event(INFO, "no_attack", "No countries to attack from")
             return
         countries_for_attack = [
             country
@@ -691,69 +992,92 @@ class Board:
         return neighbour_pairs
 
     def roll_attack_once(self, attacker: str, defender: str):
-        possible_attacks = self.get_attacks(self.graph.nodes[attacker]["owner"])
-        if not possible_attacks or (attacker, defender) not in possible_attacks:
+        # Same pairs as get_attacks(owner of attacker) without listing them
+        owner = self.graph.nodes[attacker]["owner"]
+        if (
+            self.graph.nodes[attacker]["troops"] <= 2
+            or not self.graph.has_edge(attacker, defender)
+            or self.graph.nodes[defender]["owner"] == owner
+        ):
             return
+        if self.analytics:
+            self.analytics.record_attack(
+                self.compiled_map.index[attacker], self.compiled_map.index[defender]
+            )
 
         attacker_rolls = self.dice_rolls_attack(attacker)
         defender_rolls = self.dice_rolls_defense(defender)
+        attacker_troops, defender_troops, conquered = kernels.resolve_battle(
+            self.graph.nodes[attacker]["troops"],
+            self.graph.nodes[defender]["troops"],
+            np.array(attacker_rolls),
+            np.array(defender_rolls),
+        )
 
-        attacker_rolls.sort(reverse=True)
-        defender_rolls.sort(reverse=True)
-
-        for i in range(min(len(attacker_rolls), len(defender_rolls))):
-            if self.graph.nodes[attacker]["troops"] == 1:
-                break
-            if attacker_rolls[i] < defender_rolls[i]:
-                self.update_troops(attacker, self.graph.nodes[attacker]["troops"] - 1)
-            else:
-                if self.graph.nodes[defender]["troops"] > 1:
-                    self.update_troops(
-                        defender, self.graph.nodes[defender]["troops"] - 1
-                    )
-                else:
-                    attacker_troops_left = self.graph.nodes[attacker]["troops"] - 1
-                    leave_troops_behind = 0
+        with self.batch():
+            if attacker_troops != self.graph.nodes[attacker]["troops"]:
+                self.update_troops(attacker, attacker_troops)
+            if defender_troops != self.graph.nodes[defender]["troops"]:
+                self.update_troops(defender, defender_troops)
+            if conquered:
+                if self.analytics:
+                    self.analytics.record_conquest(self.compiled_map.index[defender])
+                attacker_troops_left = attacker_troops - 1
+                leave_troops_behind = 0
 
-                    if attacker_troops_left > 3:
-                        leave_troops_behind = random.randint(0, 1)
+                if attacker_troops_left > 3:
+                    leave_troops_behind = random.randint(0, 1)
 
-                    self.update_owner(defender, self.graph.nodes[attacker]["owner"])
-                    self.update_troops(
-                        defender, attacker_troops_left - leave_troops_behind
-                    )
-                    self.update_troops(attacker, 1 + leave_troops_behind)
-                    break
+                self.update_owner(defender, owner)
+                self.update_troops(defender, attacker_troops_left - leave_troops_behind)
+                self.update_troops(attacker, 1 + leave_troops_behind)
 
     def fortify_graph(self, country1, country2, troops):
-        self.update_troops(country1, self.graph.nodes[country1]["troops"] - troops)
-        self.update_troops(country2, self.graph.nodes[country2]["troops"] + troops)
+        if self.analytics:
+            self.analytics.record_fortify(
+                self.compiled_map.index[country1],
+                self.compiled_map.index[country2],
+                troops,
+            )
+        with self.batch():
+            self.update_troops(country1, self.graph.nodes[country1]["troops"] - troops)
+            self.update_troops(country2, self.graph.nodes[country2]["troops"] + troops)
 
     def reinforce(self, player: int):
         reinforce_troops: int = self.get_bonus_troops(player)
-        print(f"Player {player} has {reinforce_troops} troops to reinforce")
+        if self.log.info_enabled:
+            self.log_event(
+                INFO,
+                "reinforce_troops",
+                "Player {player} has {troops} troops to reinforce",
+                player=player,
+                troops=reinforce_troops,
+            )
         player_countries = self.get_player_countries(player)
         if not player_countries:
             return
         cards_bonus = self.cards_handler(player)
-        print(f"Player {player} got {cards_bonus} troops from cards")
+        if self.log.info_enabled:
+            self.log_event(
+                INFO,
+                "cards_bonus",
+                "Player {player} got {troops} troops from cards",
+                player=player,
+                troops=cards_bonus,
+            )
         reinforce_troops += cards_bonus
         if cards_bonus and cards_bonus > 0:
-            plt.pause(0.1)
+            self.pause(0.1)
+        self.place_reinforcements(player, player_countries, reinforce_troops)
+
+    def place_reinforcements(
+        self, player: int, player_countries: List[str], reinforce_troops: int
+    ):
+        """Spread troops randomly over the player's frontline countries."""
         while reinforce_troops > 0:
-            player_countries_copy = player_countries.copy()
-            peaceful_destinations = [
-                country
-                for country in player_countries
-                if all(
-                    neighbour in player_countries
-                    for neighbour in list(self.graph.neighbors(country))
-                )
+            player_countries_copy = [
+                country for country in player_countries if not self.is_peaceful(country)
             ]
-            if peaceful_destinations:
-                # Remove peaceful_destinations from the possible destinations:
-                for peaceful_destination in peaceful_destinations:
-                    player_countries_copy.remove(peaceful_destination)
 
             if not player_countries_copy:
                 return
@@ -762,15 +1086,24 @@ class Board:
             troops = random.randint(1, reinforce_troops)
             reinforce_troops -= troops
             self.clear_highlighted_country()
-            plt.pause(0.1)
+            self.pause(0.1)
             self.highlight_country(country)
-            plt.pause(0.1)
-            print(f"Player {player} is reinforcing {country} with {troops} troops")
+            self.pause(0.1)
+            if self.log.info_enabled:
+                self.log_event(
+                    INFO,
+                    "reinforce",
+                    "Player {player} is reinforcing {country} with {troops} troops",
+                    player=player,
+                    country=country,
+                    troops=troops,
+                )
             self.update_troops(country, self.graph.nodes[country]["troops"] + troops)
-            plt.pause(0.1)
+            self.pause(0.1)
             self.clear_highlighted_country()
-            plt.pause(0.1)
-            print("Reinforcement done")
+            self.pause(0.1)
+            if self.log.info_enabled:
+                self.log_event(INFO, "reinforce_done", "Reinforcement done")
 
     def attack(self, player: int, already_card=False):
         possible_attacks = self.get_attacks(player)
@@ -809,44 +1142,50 @@ class Board:
         if maximum_troops_neighbour and maximum_troops_neighbour != "":
             origin = maximum_troops_neighbour
 
-        print(
-            f"Player {player} is attacking from {origin} to {destination} with {self.graph.nodes[origin]['troops']} troops"
-        )
+        if self.log.info_enabled:
+            self.log_event(
+                INFO,
+                "attack",
+                "Player {player} is attacking from {origin} to {destination} "
+                "with {troops} troops",
+                player=player,
+                origin=origin,
+                destination=destination,
+                troops=self.graph.nodes[origin]["troops"],
+            )
 
         self.clear_highlighted_edge()
         self.clear_highlighted_country()
-        plt.pause(0.1)
+        self.pause(0.1)
         self.highlight_country(origin)
         self.highlight_edge((origin, destination))
-        plt.pause(0.1)
+        self.pause(0.1)
         self.roll_attack_once(origin, destination)
-        plt.pause(0.1)
+        self.pause(0.1)
         self.clear_highlighted_edge()
         self.clear_highlighted_country()
-        plt.pause(0.1)
-        print("Attack done")
+        self.pause(0.1)
+        if self.log.info_enabled:
+            self.log_event(INFO, "attack_done", "Attack done")
 
         # Check if the player conquered a country
         local_already_card = already_card
         if (self.graph.nodes[destination]["owner"] == player) and not already_card:
-            # Change a random card owner but only cards which have not been assigned yet
-            cards = [
-                card
-                for card in self.deck_of_cards
-                if self.deck_of_cards[card]["card_owner"] == 0
-            ]
-            if cards:
-                random_card = random.choice(cards)
-                self.deck_of_cards[random_card]["card_owner"] = player
-                print(f"Player {player} got the card {random_card}")
+            self.draw_card(player)
             local_already_card = True
 
         if (self.graph.nodes[destination]["owner"] == player) and (
             self.graph.nodes[origin]["troops"] > 2
         ):
-            print(
-                f"Player {player} conquered {destination} and has troops for attacking again.\n"
-            )
+            if self.log.info_enabled:
+                self.log_event(
+                    INFO,
+                    "attack_again",
+                    "Player {player} conquered {destination} and has troops for "
+                    "attacking again.\n",
+                    player=player,
+                    destination=destination,
+                )
             self.attack(player, already_card=local_already_card)
 
         # Check if the player has any country with more than 3 troops
@@ -854,9 +1193,31 @@ class Board:
             self.graph.nodes[country]["troops"] > 3
             for country in self.get_player_countries(player)
         ):
-            print(f"Player {player} can attack\n")
+            if self.log.info_enabled:
+                self.log_event(
+                    INFO, "can_attack", "Player {player} can attack\n", player=player
+                )
             self.attack(player, already_card=local_already_card)
 
+    def draw_card(self, player: int):
+        # Change a random card owner but only cards which have not been assigned yet
+        cards = [
+            card
+            for card in self.deck_of_cards
+            if self.deck_of_cards[card]["card_owner"] == 0
+        ]
+        if cards:
+            random_card = random.choice(cards)
+            self.set_card_owner(random_card, player)
+            if self.log.info_enabled:
+                self.log_event(
+                    INFO,
+                    "card",
+                    "Player {player} got the card {card}",
+                    player=player,
+                    card=random_card,
+                )
+
     def fortify(self, player: int):
         player_countries = self.get_player_countries(player)
         if not player_countries:
@@ -878,82 +1239,275 @@ class Board:
         if not destinations:
             return
 
-        # Check wich destinations are surrounded by player's countries only
-        peaceful_destinations = [
-            country
-            for country in destinations
-            if all(
-                neighbour in player_countries
-                for neighbour in list(self.graph.neighbors(country))
-            )
+        # Drop destinations surrounded by player's countries only
+        destinations = [
+            country for country in destinations if not self.is_peaceful(country)
         ]
-        if peaceful_destinations:
-            # Remove peaceful_destinations from the possible destinations:
-            for peaceful_destination in peaceful_destinations:
-                destinations.remove(peaceful_destination)
         if not destinations:
             return
         origin_troops = self.graph.nodes[origin]["troops"]
-        # Check if all origin neighbours are player's countries
-        origin_peaceful = all(
-            neighbour in player_countries
-            for neighbour in list(self.graph.neighbors(origin))
-        )
+        origin_peaceful = self.is_peaceful(origin)
         lower_level_margin = 1
         if origin_peaceful and origin_troops > 3:
             lower_level_margin = origin_troops - 2
 
         destination = random.choice(destinations)
         n_troops = random.randint(lower_level_margin, origin_troops - 1)
-        print(
-            f"Player {player} is fortifying from {origin} to {destination} with {n_troops} troops"
-        )
+        if self.log.info_enabled:
+            self.log_event(
+                INFO,
+                "fortify",
+                "Player {player} is fortifying from {origin} to {destination} "
+                "with {troops} troops",
+                player=player,
+                origin=origin,
+                destination=destination,
+                troops=n_troops,
+            )
         self.clear_highlighted_country()
         self.clear_highlighted_edge()
-        plt.pause(0.1)
+        self.pause(0.1)
         self.highlight_country(destination)
         self.highlight_edge_slightly((origin, destination))
-        plt.pause(0.1)
+        self.pause(0.1)
         self.fortify_graph(origin, destination, n_troops)
-        plt.pause(0.1)
+        self.pause(0.1)
         self.clear_highlighted_country()
         self.clear_highlighted_edge()
-        plt.pause(0.1)
-        print("Fortification done\n")
+        self.pause(0.1)
+        if self.log.info_enabled:
+            self.log_event(INFO, "fortify_done", "Fortification done\n")
+
+    def log_event(self, level: int, event: str, template: str, **fields):
+        self.log.emit(level, event, template, turn=self.game_turn, **fields)
+
+    def active_players(self) -> List[int]:
+        """Players that still own a country, in turn order."""
+        return [
+            player
+            for player, stats in self.player_stats.items()
+            if stats["territories"] > 0
+        ]
 
     def world_is_conquered(self):
-        players = [self.graph.nodes[country]["owner"] for country in self.graph.nodes]
-        if len(set(players)) == 1:
-            print(f"Player {players[0]} has conquered the world!")
-            return True
-        return False
+        # player_stats is kept up to date by update_owner, no need to scan nodes
+        players = self.active_players()
+        n_countries = self.graph.number_of_nodes()
+        if players and self.player_stats[players[0]]["territories"] != n_countries:
+            return False
+        winner = players[0] if players else 0
+        if self.log.info_enabled:
+            self.log_event(
+                INFO,
+                "world_conquered",
+                "Player {player} has conquered the world!",
+                player=winner,
+            )
+        return True
+
+    def adjudicate(self, by="territories") -> int:
+        """Winner of an unfinished game by territories, troops or a score.
+
+        by is "territories" or "troops", with ties broken by the other one and
+        then by seat, or a function (board, player) -> score.
+        """
+        players = self.active_players()
+        if callable(by):
+            return max(players, key=lambda player: by(self, player))
+        first, second = (
+            ("troops", "territories")
+            if by == "troops"
+            else (
+                "territories",
+                "troops",
+            )
+        )
+        return max(
+            players,
+            key=lambda player: (
+                self.player_stats[player][first],
+                self.player_stats[player][second],
+                -player,
+            ),
+        )
+
+    def set_current_player(self, player: int):
+        self.state_hash ^= (
+            self.zobrist.player_keys[self.current_player]
+            ^ self.zobrist.player_keys[player]
+        )
+        self.current_player = player
+
+    def compute_state_hash(self) -> int:
+        """Hash the current position from scratch."""
+        return self.zobrist.full_hash(
+            [self.graph.nodes[country]["owner"] for country in self.graph.nodes],
+            [self.graph.nodes[country]["troops"] for country in self.graph.nodes],
+            {
+                card: self.deck_of_cards[card]["card_owner"]
+                for card in self.deck_of_cards
+            },
+            self.current_player,
+        )
 
     def turn(self, player: int):
-        self.reinforce(player)
-        print("\n")
-        plt.pause(0.1)
-        self.attack(player)
-        print("\n")
-        plt.pause(0.1)
-        self.fortify(player)
-        print("\n")
-        plt.pause(0.1)
-
-    def game(self):
-        self.game_turn += 1
-        plt.pause(0.1)
+        self.set_current_player(player)
+        self.play_phase(player, "reinforce")
+        self.pause(0.1)
+        self.play_phase(player, "attack")
+        self.pause(0.1)
+        self.play_phase(player, "fortify")
+        self.end_turn()
+        self.pause(0.1)
+
+    def play_phase(self, player: int, phase: str):
+        """Play "reinforce", "attack" or "fortify" with the player's agent."""
+        agent = self.agents.get(player)
+        if agent is None:
+            getattr(self, phase)(player)
+        else:
+            getattr(agent, phase)(self, player)
+        self.end_phase(player, phase)
+
+    def end_phase(self, player: int, phase: str):
+        if self.log.info_enabled:
+            self.log_event(INFO, "phase_end", "\n", player=player, phase=phase)
+
+    def end_turn(self):
+        if self.analytics:
+            self.analytics.record_troops(
+                np.array(
+                    [self.graph.nodes[country]["troops"] for country in self.graph]
+                )
+            )
+
+    def game(
+        self,
+        sink=None,
+        game_id: int = 0,
+        max_turns: Optional[int] = None,
+        stalemate_turns: Optional[int] = None,
+        adjudication="territories",
+    ):
+        """Play until one player owns every country.
+
+        With a results sink (see src/results.py) a record is written after
+        every turn and at the end of the game. The game also ends after
+        max_turns turns, or on a stalemate when stalemate_turns is set, and
+        then the winner is adjudicated, see adjudicate(). self.winner and
+        self.end_reason hold the outcome.
+        """
+        for _ in self.game_steps(
+            sink, game_id, max_turns, stalemate_turns, adjudication
+        ):
+            pass
+
+    def territory_counts(self) -> Tuple[int, ...]:
+        return tuple(stats["territories"] for stats in self.player_stats.values())
+
+    def game_steps(
+        self,
+        sink=None,
+        game_id: int = 0,
+        max_turns: Optional[int] = None,
+        stalemate_turns: Optional[int] = None,
+        adjudication="territories",
+    ):
+        """Generator version of game(), yielding the player after every turn.
+
+        The number of turns taken from it is the position used to checkpoint
+        and replay a game, see src/checkpoint.py.
+        """
+        if sink is not None:
+            # Imported here, the results module needs pandas
+            from src.results import (
+                board_game_record,
+                board_starting_continents,
+                board_turn_record,
+            )
+
+            start_continents = board_starting_continents(self)
+        self.begin_game()
+        self.pause(0.1)
         self.update_info_panel()
-        plt.pause(0.1)
+        self.pause(0.1)
         while not self.world_is_conquered():
-            for player in range(1, 7):
+            for player in self.round_players():
                 self.turn(player)
-                plt.pause(0.1)
+                if sink is not None:
+                    sink.write_turn(board_turn_record(self, game_id, player))
+                self.pause(0.1)
                 self.update_info_panel()
-                plt.pause(0.1)
-            self.game_turn += 1
-            plt.pause(0.1)
+                self.pause(0.1)
+                yield player
+            game_over = self.end_round(max_turns, stalemate_turns)
+            self.pause(0.1)
             self.update_info_panel()
-            plt.pause(0.1)
+            self.pause(0.1)
+            if game_over:
+                break
+        self.end_game(adjudication)
+        if sink is not None:
+            sink.write_game(board_game_record(self, game_id, start_continents))
+
+    # The steps of game_steps(), shared with the asyncio loop of
+    # src/async_game.py
+
+    def begin_game(self):
+        self.winner = 0
+        self.end_reason = None
+        self.seen_hashes = {}
+        self.last_progress = (self.game_turn + 1, self.territory_counts())
+        self.game_turn += 1
+
+    def round_players(self):
+        """The players to move this round; eliminated players get no turn."""
+        for player in self.active_players():
+            if self.player_stats[player]["territories"] > 0:
+                yield player
+
+    def end_round(
+        self, max_turns: Optional[int] = None, stalemate_turns: Optional[int] = None
+    ) -> bool:
+        """Advance the turn counter, True when the game is capped or stalled."""
+        self.game_turn += 1
+        if max_turns is not None and self.game_turn > max_turns:
+            self.end_reason = "turn_cap"
+            return True
+        if stalemate_turns is not None:
+            # A position seen three times or no change of territory counts for
+            # stalemate_turns turns
+            self.seen_hashes[self.state_hash] = (
+                self.seen_hashes.get(self.state_hash, 0) + 1
+            )
+            counts = self.territory_counts()
+            if counts != self.last_progress[1]:
+                self.last_progress = (self.game_turn, counts)
+            if (
+                self.seen_hashes[self.state_hash] >= 3
+                or self.game_turn - self.last_progress[0] >= stalemate_turns
+            ):
+                self.end_reason = "stalemate"
+                return True
+        return False
+
+    def end_game(self, adjudication="territories"):
+        """Set winner and end_reason, adjudicating a capped or stalled game."""
+        if self.end_reason is None:
+            self.end_reason = "conquest"
+            self.winner = self.active_players()[0] if self.active_players() else 0
+        else:
+            self.winner = self.adjudicate(adjudication)
+            if self.log.info_enabled:
+                self.log_event(
+                    INFO,
+                    "adjudicated",
+                    "Game ended by {reason}, player {player} wins",
+                    reason=self.end_reason,
+                    player=self.winner,
+                )
+        if self.analytics:
+            self.analytics.games += 1
 
 
 if __name__ == "__main__":
@@ -961,6 +1515,6 @@ if __name__ == "__main__":
     board = Board()
     board.populate_initial_board()
     print("Initial board populated.")
-    plt.pause(0.1)
+    board.pause(0.1)
     board.game()
-    plt.pause(0.1)
+    board.pause(0.1)
@@ -0,0 +1,178 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+from src.compiled_map import CompiledMap, classic_map
+
+METRICS = ("conquests", "troops", "fortified_in", "fortified_out")
+
+
+class HeatmapCounters:
+    """Per-territory and per-edge counters accumulated across games.
+
+    Board and VectorizedGames increment these when an analytics object is
+    attached to them:
+
+    - conquests[territory]: times the territory changed hands in battle.
+    - attacks[edge]: dice rolls along the edge, in either direction.
+    - fortified_in/out[territory]: troops moved in or out by fortification.
+    - troop_sum[territory] / troop_samples: mean troops at the end of turns.
+    """
+
+    def __init__(self, compiled_map: Optional[CompiledMap] = None):
+        self.map = compiled_map or classic_map()
+        n = self.map.n_territories
+        self.conquests = np.zeros(n, dtype=np.int64)
+        self.attacks = np.zeros(self.map.n_edges, dtype=np.int64)
+        self.fortified_in = np.zeros(n, dtype=np.int64)
+        self.fortified_out = np.zeros(n, dtype=np.int64)
+        self.troop_sum = np.zeros(n, dtype=np.float64)
+        self.troop_samples = 0
+        self.games = 0
+
+    def record_conquest(self, territory: int):
+        self.conquests[territory] += 1
+
+    def record_attack(self, origin: int, destination: int):
+        self.attacks[self.map.edge_ids[origin, destination]] += 1
+
+    def record_fortify(self, origin: int, destination: int, troops: int):
+        self.fortified_out[origin] += troops
+        self.fortified_in[destination] += troops
+
+    def record_troops(self, troops: np.ndarray):
+        """Add one sample per row of a (territories,) or (games, territories) array."""
+        troops = np.atleast_2d(troops)
+        self.troop_sum += troops.sum(axis=0)
+        self.troop_samples += troops.shape[0]
+
+    # Batched versions for VectorizedGames
+
+    def record_conquests(self, territories: np.ndarray):
+        np.add.at(self.conquests, territories, 1)
+
+    def record_attacks(self, origins: np.ndarray, destinations: np.ndarray):
+        np.add.at(self.attacks, self.map.edge_ids[origins, destinations], 1)
+
+    def record_fortifies(
+        self, origins: np.ndarray, destinations: np.ndarray, troops: np.ndarray
+    ):
+        np.add.at(self.fortified_out, origins, troops)
+        np.add.at(self.fortified_in, destinations, troops)
+
+    def mean_troops(self) -> np.ndarray:
+        return self.troop_sum / max(self.troop_samples, 1)
+
+    def metric(self, name: str) -> np.ndarray:
+        if name == "troops":
+            return self.mean_troops()
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric {name!r}, expected one of {METRICS}")
+        return getattr(self, name)
+
+    def merge(self, other: "HeatmapCounters"):
+        """Add the counts of another object, e.g. from a worker process."""
+        self.conquests += other.conquests
+        self.attacks += other.attacks
+        self.fortified_in += other.fortified_in
+        self.fortified_out += other.fortified_out
+        self.troop_sum += other.troop_sum
+        self.troop_samples += other.troop_samples
+        self.games += other.games
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            conquests=self.conquests,
+            attacks=self.attacks,
+            fortified_in=self.fortified_in,
+            fortified_out=self.fortified_out,
+            troop_sum=self.troop_sum,
+            troop_samples=self.troop_samples,
+            games=self.games,
+        )
+
+    @classmethod
+    def load(
+        cls, path: str, compiled_map: Optional[CompiledMap] = None
+    ) -> "HeatmapCounters":
+        counters = cls(compiled_map)
+        with np.load(path) as data:
+            for name in ("conquests", "attacks", "fortified_in", "fortified_out"):
+                getattr(counters, name)[:] = data[name]
+            counters.troop_sum[:] = data["troop_sum"]
+            counters.troop_samples = int(data["troop_samples"])
+            counters.games = int(data["games"])
+        return counters
+
+
+def render_heatmap(
+    counters: HeatmapCounters,
+    metric: str = "conquests",
+    path: Optional[str] = None,
+    ax=None,
+    cmap: str = "inferno",
+):
+    """Overlay a territory metric and the edge attack counts on the board image.
+
+    Territories are drawn at their positions, colored and sized by the metric,
+    edges are colored by the number of attacks along them. With a path the
+    figure is saved there, otherwise the axes are returned for showing.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    compiled_map = counters.map
+    if ax is None:
+        _, ax = plt.subplots(figsize=(12.8, 7.2))
+    img_path = os.path.join(os.path.dirname(__file__), "..", "img", "risk_720p.png")
+    ax.imshow(plt.imread(img_path), extent=[0, 1280, 0, 720], aspect="equal")
+    ax.set_xlim([0, 1280])
+    ax.set_ylim([0, 720])
+    ax.axis("off")
+
+    attacks = counters.attacks.astype(np.float64)
+    xy = compiled_map.positions
+    segments = xy[compiled_map.edges]
+    # The Alaska - Kamchatka edge wraps around the map, as in Board.get_edges_list
+    wraps = np.abs(segments[:, 0, 0] - segments[:, 1, 0]) > 640
+    lines = LineCollection(
+        segments[~wraps],
+        array=attacks[~wraps],
+        cmap=cmap,
+        linewidths=1 + 5 * attacks[~wraps] / max(attacks.max(), 1),
+        alpha=0.8,
+        zorder=2,
+    )
+    ax.add_collection(lines)
+
+    values = counters.metric(metric).astype(np.float64)
+    scale = values / values.max() if values.max() > 0 else values
+    points = ax.scatter(
+        xy[:, 0],
+        xy[:, 1],
+        s=300 + 1700 * scale,
+        c=values,
+        cmap=cmap,
+        alpha=0.7,
+        edgecolors="black",
+        zorder=3,
+    )
+    for (x, y), value in zip(xy, values):
+        label = f"{value:.1f}" if metric == "troops" else f"{int(value)}"
+        ax.text(
+            x,
+            y,
+            label,
+            ha="center",
+            va="center",
+            fontsize=9,
+            family="monospace",
+            fontweight="bold",
+            zorder=4,
+        )
+    ax.figure.colorbar(points, ax=ax, fraction=0.03, pad=0.01, label=metric)
+    if path:
+        ax.figure.savefig(path, bbox_inches="tight")
+    return ax
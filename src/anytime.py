@@ -0,0 +1,264 @@
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import networkx as nx
+
+from src.abstract_ai import AI
+
+PHASES = ("reinforce", "attack", "fortify")
+
+# Marks a search that ended without yielding any answer
+NO_ANSWER = object()
+
+
+class Deadline:
+    """A point in time that searches poll cooperatively via expired()."""
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, seconds: float):
+        self.start = time.perf_counter()
+        self.end = self.start + seconds
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.end
+
+    def remaining(self) -> float:
+        return max(self.end - time.perf_counter(), 0.0)
+
+    def overrun(self) -> float:
+        return max(time.perf_counter() - self.end, 0.0)
+
+
+class Budgets:
+    """Seconds an agent may spend per phase and per single decision.
+
+    The attack phase is a sequence of decisions, one per dice roll, each
+    limited to min(move, time left in the phase).
+    """
+
+    def __init__(
+        self,
+        reinforce: float = 0.01,
+        attack: float = 0.05,
+        fortify: float = 0.01,
+        move: float = 0.005,
+    ):
+        self.phase = {"reinforce": reinforce, "attack": attack, "fortify": fortify}
+        self.move = move
+
+
+class BudgetStats:
+    """Per phase counts of decisions, overruns and fallbacks."""
+
+    def __init__(self):
+        self.decisions = dict.fromkeys(PHASES, 0)
+        self.iterations = dict.fromkeys(PHASES, 0)
+        self.fallbacks = dict.fromkeys(PHASES, 0)
+        self.overruns = dict.fromkeys(PHASES, 0)
+        self.overrun_time = dict.fromkeys(PHASES, 0.0)
+        self.max_overrun = dict.fromkeys(PHASES, 0.0)
+
+    def record(self, phase: str, iterations: int, overrun: float):
+        self.decisions[phase] += 1
+        self.iterations[phase] += iterations
+        if overrun > 0:
+            self.overruns[phase] += 1
+            self.overrun_time[phase] += overrun
+            self.max_overrun[phase] = max(self.max_overrun[phase], overrun)
+
+    def summary(self) -> Dict[str, dict]:
+        return {
+            phase: {
+                "decisions": self.decisions[phase],
+                "iterations": self.iterations[phase],
+                "fallbacks": self.fallbacks[phase],
+                "overruns": self.overruns[phase],
+                "overrun_time": self.overrun_time[phase],
+                "max_overrun": self.max_overrun[phase],
+            }
+            for phase in PHASES
+        }
+
+
+class AnytimeAI(AI):
+    """Base class for agents deciding under a deadline.
+
+    Subclasses implement search_reinforce, search_attack and search_fortify as
+    generators yielding better and better answers. The last answer yielded
+    before the deadline is played; searches should also poll
+    deadline.expired() inside long loops, since nothing interrupts them. A
+    search that yields nothing before the deadline, or an illegal answer,
+    falls back to the built-in Board heuristic for the rest of the phase.
+
+        board.agents[3] = FrontlineAI(board.graph)
+    """
+
+    def __init__(self, G: nx.Graph, budgets: Optional[Budgets] = None):
+        super().__init__(G)
+        self.budgets = budgets or Budgets()
+        self.stats = BudgetStats()
+
+    def search_reinforce(
+        self, board, player: int, troops: int, deadline: Deadline
+    ) -> Iterator[List[Tuple[str, int]]]:
+        """Yield placements as lists of (country, troops) summing to troops."""
+        return iter(())
+
+    def search_attack(
+        self, board, player: int, deadline: Deadline
+    ) -> Iterator[Optional[Tuple[str, str]]]:
+        """Yield the next (origin, destination) to roll, or None to stop."""
+        return iter(())
+
+    def search_fortify(
+        self, board, player: int, deadline: Deadline
+    ) -> Iterator[Optional[Tuple[str, str, int]]]:
+        """Yield (origin, destination, troops) to move, or None to skip."""
+        return iter(())
+
+    def decide(self, phase: str, search: Iterable, deadline: Deadline):
+        """Run a search until it ends or the deadline expires.
+
+        Returns the last answer yielded before the deadline; one that only
+        arrives after it is dropped, so the move never depends on work done
+        past the deadline.
+        """
+        answer = NO_ANSWER
+        iterations = 0
+        for candidate in search:
+            if deadline.expired():
+                break
+            answer = candidate
+            iterations += 1
+        self.stats.record(phase, iterations, deadline.overrun())
+        return answer
+
+    def reinforce(self, board, player: int):
+        player_countries = board.get_player_countries(player)
+        if not player_countries:
+            return
+        troops = board.get_bonus_troops(player) + board.cards_handler(player)
+        deadline = Deadline(self.budgets.phase["reinforce"])
+        placements = self.decide(
+            "reinforce",
+            self.search_reinforce(board, player, troops, deadline),
+            deadline,
+        )
+        if placements is NO_ANSWER or not legal_reinforcements(
+            board, player, troops, placements
+        ):
+            self.stats.fallbacks["reinforce"] += 1
+            board.place_reinforcements(player, player_countries, troops)
+            return
+        with board.batch():
+            for country, n_troops in placements:
+                board.update_troops(
+                    country, board.graph.nodes[country]["troops"] + n_troops
+                )
+
+    def attack(self, board, player: int):
+        phase = Deadline(self.budgets.phase["attack"])
+        already_card = False
+        while not phase.expired():
+            deadline = Deadline(min(self.budgets.move, phase.remaining()))
+            pair = self.decide(
+                "attack", self.search_attack(board, player, deadline), deadline
+            )
+            if pair is None:
+                return
+            if pair is NO_ANSWER or pair not in (board.get_attacks(player) or []):
+                self.stats.fallbacks["attack"] += 1
+                board.attack(player, already_card)
+                return
+            origin, destination = pair
+            board.roll_attack_once(origin, destination)
+            if board.graph.nodes[destination]["owner"] == player and not already_card:
+                board.draw_card(player)
+                already_card = True
+
+    def fortify(self, board, player: int):
+        deadline = Deadline(self.budgets.phase["fortify"])
+        move = self.decide(
+            "fortify", self.search_fortify(board, player, deadline), deadline
+        )
+        if move is None:
+            return
+        if move is NO_ANSWER or not legal_fortification(board, player, *move):
+            self.stats.fallbacks["fortify"] += 1
+            board.fortify(player)
+            return
+        board.fortify_graph(*move)
+
+
+def legal_reinforcements(board, player: int, troops: int, placements) -> bool:
+    return sum(n for _, n in placements) == troops and all(
+        n > 0 and board.graph.nodes[country]["owner"] == player
+        for country, n in placements
+    )
+
+
+def legal_fortification(
+    board, player: int, origin: str, destination: str, troops: int
+) -> bool:
+    return (
+        origin != destination
+        and board.graph.nodes[origin]["owner"] == player
+        and board.graph.nodes[destination]["owner"] == player
+        and 0 < troops < board.graph.nodes[origin]["troops"]
+        and board.path_exists(origin, destination, player)
+    )
+
+
+class FrontlineAI(AnytimeAI):
+    """Example anytime agent using the threat map of the board.
+
+    Every search scans its candidates in order and yields each improvement,
+    so a short budget still plays the best candidate seen so far.
+    """
+
+    def search_reinforce(self, board, player, troops, deadline):
+        # Everything on the frontline country with the highest enemy pressure
+        best = None
+        for country in board.frontline_countries(player):
+            pressure = board.threat_map.pressure(board.compiled_map.index[country])
+            if best is None or pressure > best:
+                best = pressure
+                yield [(country, troops)]
+            if deadline.expired():
+                return
+
+    def search_attack(self, board, player, deadline):
+        # The attack with the highest troop ratio, stop when none is favourable
+        best_ratio = 1.5
+        yield None
+        for origin, destination in board.get_attacks(player) or []:
+            ratio = (
+                board.graph.nodes[origin]["troops"]
+                / board.graph.nodes[destination]["troops"]
+            )
+            if ratio > best_ratio:
+                best_ratio = ratio
+                yield origin, destination
+            if deadline.expired():
+                return
+
+    def search_fortify(self, board, player, deadline):
+        # Move the largest interior stack to the most threatened reachable front
+        interior = [
+            country
+            for country in board.get_player_countries(player)
+            if board.is_peaceful(country) and board.graph.nodes[country]["troops"] > 1
+        ]
+        if not interior:
+            yield None
+            return
+        origin = max(interior, key=lambda country: board.graph.nodes[country]["troops"])
+        troops = board.graph.nodes[origin]["troops"] - 1
+        yield None
+        for destination in board.frontline_countries(player):
+            if board.path_exists(origin, destination, player):
+                yield origin, destination, troops
+                return
+            if deadline.expired():
+                return
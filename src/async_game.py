@@ -0,0 +1,341 @@
+"""asyncio version of Board.game() for awaited agents and many games at once.
+
+Every phase of a turn is a coroutine and the game yields to the event loop
+between phases, between attack rolls and while an agent decision is awaited,
+so one event loop can play many games and keep a renderer responsive. Games
+share the global random module, so each game keeps its own random state
+across every await (see keep_random_state) and plays exactly as it would
+alone with the same seed.
+
+    host = GameHost(max_turns=500, stalemate_turns=40)
+    results = asyncio.run(host.run(range(100)))
+
+Boards should be headless and drawn through observers such as
+src.pygame_renderer.PygameRenderer: the built-in heuristics of a Board with a
+matplotlib window pause with plt.pause, which blocks the event loop.
+"""
+
+import asyncio
+import random
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.anytime import (
+    NO_ANSWER,
+    AnytimeAI,
+    Deadline,
+    legal_fortification,
+    legal_reinforcements,
+)
+from src.board_pool import BoardPool
+
+
+class AsyncAgent:
+    """Agent whose decisions are awaited by the game coroutines.
+
+    The choose_* coroutines return one decision in the form of the searches
+    of src.anytime.AnytimeAI: placements, the next (origin, destination) to
+    roll or None to stop attacking, and (origin, destination, troops) or None
+    to skip fortifying. NO_ANSWER, an illegal decision or a timeout lets the
+    built-in heuristic play the rest of the phase.
+    """
+
+    def __init__(self):
+        self.timeouts = 0
+
+    async def choose_reinforcements(self, board, player: int, troops: int):
+        return NO_ANSWER
+
+    async def choose_attack(self, board, player: int):
+        return NO_ANSWER
+
+    async def choose_fortification(self, board, player: int):
+        return NO_ANSWER
+
+
+class ExecutorAgent(AsyncAgent):
+    """Run the searches of an AnytimeAI in a thread pool.
+
+    The search reads the board while its game waits for the answer and the
+    move is applied back in the event loop, so other games and the renderer
+    keep running during long searches.
+    """
+
+    def __init__(self, agent: AnytimeAI, executor=None):
+        super().__init__()
+        self.agent = agent
+        self.executor = executor
+
+    async def search(self, phase: str, seconds: float, start_search: Callable):
+        def run():
+            deadline = Deadline(seconds)
+            return self.agent.decide(phase, start_search(deadline), deadline)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, run)
+
+    async def choose_reinforcements(self, board, player, troops):
+        return await self.search(
+            "reinforce",
+            self.agent.budgets.phase["reinforce"],
+            lambda deadline: self.agent.search_reinforce(
+                board, player, troops, deadline
+            ),
+        )
+
+    async def choose_attack(self, board, player):
+        return await self.search(
+            "attack",
+            self.agent.budgets.move,
+            lambda deadline: self.agent.search_attack(board, player, deadline),
+        )
+
+    async def choose_fortification(self, board, player):
+        return await self.search(
+            "fortify",
+            self.agent.budgets.phase["fortify"],
+            lambda deadline: self.agent.search_fortify(board, player, deadline),
+        )
+
+
+class QueueAgent(AsyncAgent):
+    """Decisions answered through asyncio queues, e.g. by a network handler.
+
+    Every decision puts (request_id, phase, board, player, troops) on
+    requests, troops being None outside of reinforcement, and awaits
+    (request_id, answer) on answers. Answers to other ids, such as the late
+    answer to a decision that timed out, are dropped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.requests: asyncio.Queue = asyncio.Queue()
+        self.answers: asyncio.Queue = asyncio.Queue()
+        self.next_request_id = 0
+        self.stale_answers = 0
+
+    async def ask(self, phase: str, board, player: int, troops: Optional[int] = None):
+        request_id = self.next_request_id
+        self.next_request_id += 1
+        await self.requests.put((request_id, phase, board, player, troops))
+        while True:
+            answer_id, answer = await self.answers.get()
+            if answer_id == request_id:
+                return answer
+            self.stale_answers += 1
+
+    async def choose_reinforcements(self, board, player, troops):
+        return await self.ask("reinforce", board, player, troops)
+
+    async def choose_attack(self, board, player):
+        return await self.ask("attack", board, player)
+
+    async def choose_fortification(self, board, player):
+        return await self.ask("fortify", board, player)
+
+
+async def keep_random_state(awaitable: Awaitable):
+    """Await without letting other games advance this game's random stream."""
+    state = random.getstate()
+    try:
+        return await awaitable
+    finally:
+        random.setstate(state)
+
+
+async def decide(agent: AsyncAgent, decision: Awaitable, timeout: Optional[float]):
+    """Await a decision, NO_ANSWER when it takes longer than timeout."""
+    try:
+        return await keep_random_state(asyncio.wait_for(decision, timeout))
+    except asyncio.TimeoutError:
+        agent.timeouts += 1
+        return NO_ANSWER
+
+
+def is_placements(board, answer) -> bool:
+    """Whether answer has the shape of placements: [(country, troops), ...]."""
+    return isinstance(answer, (list, tuple)) and all(
+        isinstance(placement, (list, tuple))
+        and len(placement) == 2
+        and placement[0] in board.graph
+        and isinstance(placement[1], int)
+        for placement in answer
+    )
+
+
+def is_fortification(board, answer) -> bool:
+    """Whether answer has the shape (origin, destination, troops)."""
+    return (
+        isinstance(answer, (list, tuple))
+        and len(answer) == 3
+        and answer[0] in board.graph
+        and answer[1] in board.graph
+        and isinstance(answer[2], int)
+    )
+
+
+async def reinforce(board, player: int, agent: AsyncAgent, timeout=None):
+    player_countries = board.get_player_countries(player)
+    if not player_countries:
+        return
+    troops = board.get_bonus_troops(player) + board.cards_handler(player)
+    placements = await decide(
+        agent, agent.choose_reinforcements(board, player, troops), timeout
+    )
+    if not is_placements(board, placements) or not legal_reinforcements(
+        board, player, troops, placements
+    ):
+        board.place_reinforcements(player, player_countries, troops)
+        return
+    with board.batch():
+        for country, n_troops in placements:
+            board.update_troops(
+                country, board.graph.nodes[country]["troops"] + n_troops
+            )
+
+
+async def attack(board, player: int, agent: AsyncAgent, timeout=None):
+    already_card = False
+    while True:
+        pair = await decide(agent, agent.choose_attack(board, player), timeout)
+        if pair is None:
+            return
+        if pair is NO_ANSWER or pair not in (board.get_attacks(player) or []):
+            board.attack(player, already_card)
+            return
+        origin, destination = pair
+        board.roll_attack_once(origin, destination)
+        if board.graph.nodes[destination]["owner"] == player and not already_card:
+            board.draw_card(player)
+            already_card = True
+
+
+async def fortify(board, player: int, agent: AsyncAgent, timeout=None):
+    move = await decide(agent, agent.choose_fortification(board, player), timeout)
+    if move is None:
+        return
+    if not is_fortification(board, move) or not legal_fortification(
+        board, player, *move
+    ):
+        board.fortify(player)
+        return
+    board.fortify_graph(*move)
+
+
+PHASES = {"reinforce": reinforce, "attack": attack, "fortify": fortify}
+
+
+async def play_phase(
+    board, player: int, phase: str, agent: Optional[AsyncAgent], timeout=None
+):
+    """One phase by an AsyncAgent, else as Board.play_phase plays it."""
+    if agent is None:
+        board.play_phase(player, phase)
+        return
+    await PHASES[phase](board, player, agent, timeout)
+    board.end_phase(player, phase)
+
+
+async def play_turn(
+    board,
+    player: int,
+    agent: Optional[AsyncAgent] = None,
+    timeout: Optional[float] = None,
+    delay: float = 0.0,
+):
+    """Board.turn() yielding to the event loop after every phase."""
+    board.set_current_player(player)
+    await play_phase(board, player, "reinforce", agent, timeout)
+    await keep_random_state(asyncio.sleep(delay))
+    await play_phase(board, player, "attack", agent, timeout)
+    await keep_random_state(asyncio.sleep(delay))
+    await play_phase(board, player, "fortify", agent, timeout)
+    board.end_turn()
+    await keep_random_state(asyncio.sleep(delay))
+
+
+async def play_game(
+    board,
+    agents: Optional[Dict[int, AsyncAgent]] = None,
+    max_turns: Optional[int] = None,
+    stalemate_turns: Optional[int] = None,
+    adjudication="territories",
+    decision_timeout: Optional[float] = None,
+    delay: float = 0.0,
+) -> int:
+    """Coroutine version of Board.game() on a populated board.
+
+    agents maps players to AsyncAgents; the other players are played by
+    board.agents or the built-in heuristics. Decisions taking longer than
+    decision_timeout fall back to the heuristics, and delay is the pause
+    after every phase. Returns the winner.
+    """
+    agents = agents or {}
+    board.begin_game()
+    board.update_info_panel()
+    while not board.world_is_conquered():
+        for player in board.round_players():
+            await play_turn(board, player, agents.get(player), decision_timeout, delay)
+            board.update_info_panel()
+        if board.end_round(max_turns, stalemate_turns):
+            break
+    board.end_game(adjudication)
+    return board.winner
+
+
+class GameHost:
+    """Many games multiplexed in one event loop, on pooled headless boards.
+
+    At most max_concurrent games run at once. With frame, e.g. the flush of
+    a PygameRenderer, a task calls it fps times per second while games run,
+    so the window keeps handling events whatever the games do.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[BoardPool] = None,
+        max_concurrent: int = 64,
+        frame: Optional[Callable[[], None]] = None,
+        fps: int = 30,
+        **game_kwargs,
+    ):
+        self.pool = pool or BoardPool(max_size=max_concurrent)
+        self.max_concurrent = max_concurrent
+        self.frame = frame
+        self.fps = fps
+        self.game_kwargs = game_kwargs
+
+    async def play(
+        self,
+        seed,
+        agents: Optional[Dict[int, AsyncAgent]] = None,
+        observers: Iterable[Callable[[dict], None]] = (),
+    ) -> Tuple[int, int, Optional[str]]:
+        """Play one game from seed; returns (winner, turns, end reason)."""
+        async with self.slots:
+            with self.pool.board(seed) as board:
+                for observer in observers:
+                    board.add_observer(observer)
+                board.populate_initial_board(animate=False)
+                await play_game(board, agents, **self.game_kwargs)
+                return board.winner, board.game_turn, board.end_reason
+
+    async def frames(self):
+        while True:
+            self.frame()
+            await asyncio.sleep(1 / self.fps)
+
+    async def run(
+        self,
+        seeds: Iterable,
+        agents: Optional[Callable[[object], Dict[int, AsyncAgent]]] = None,
+    ) -> List[Tuple[int, int, Optional[str]]]:
+        """Play a game per seed; agents(seed) gives the AsyncAgents of a game."""
+        self.slots = asyncio.Semaphore(self.max_concurrent)
+        frames = asyncio.create_task(self.frames()) if self.frame else None
+        try:
+            return await asyncio.gather(
+                *(self.play(seed, agents(seed) if agents else None) for seed in seeds)
+            )
+        finally:
+            if frames is not None:
+                frames.cancel()
@@ -0,0 +1,268 @@
+import itertools
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.anytime import AnytimeAI
+from src.compiled_map import CompiledMap, classic_map
+from src.zobrist import ZobristKeys, classic_zobrist
+
+# Board.get_attacks only attacks from countries with more than 2 troops
+MIN_ATTACK_TROOPS = 3
+
+
+@lru_cache(maxsize=None)
+def roll_outcomes(attacker: int, defender: int) -> Tuple[Tuple[int, int, bool, float]]:
+    """Exact outcomes of one roll of Board.roll_attack_once.
+
+    Returns (attacker losses, defender losses, conquered, probability)
+    tuples. Only min(attacker, 4) and min(defender, 3) matter, so callers
+    should pass the clamped values to share the cache.
+    """
+    n_attack = 3 if attacker > 3 else 2 if attacker == 3 else 1
+    n_defend = 2 if defender > 1 else 1
+    counts: Dict[Tuple[int, int, bool], int] = {}
+    for dice in itertools.product(range(1, 7), repeat=n_attack + n_defend):
+        attack = sorted(dice[:n_attack], reverse=True)
+        defend = sorted(dice[n_attack:], reverse=True)
+        a, d, conquered = attacker, defender, False
+        for i in range(min(n_attack, n_defend)):
+            if a == 1:
+                break
+            if attack[i] < defend[i]:
+                a -= 1
+            elif d > 1:
+                d -= 1
+            else:
+                conquered = True
+                break
+        outcome = (attacker - a, defender - d, conquered)
+        counts[outcome] = counts.get(outcome, 0) + 1
+    total = 6 ** (n_attack + n_defend)
+    return tuple((*outcome, n / total) for outcome, n in counts.items())
+
+
+@lru_cache(maxsize=None)
+def battle_odds(attacker: int, defender: int) -> Tuple[float, float]:
+    """Probability of conquering and expected attacker troops when it happens.
+
+    The attacker keeps rolling until the defender is beaten or it is left
+    with fewer than MIN_ATTACK_TROOPS troops. The odds are filled bottom-up
+    by defender troops, keeping the last three rows, so any battle size
+    works without recursion.
+    """
+    if attacker < MIN_ATTACK_TROOPS:
+        return 0.0, 0.0
+    # rows[d][a]: (probability of conquering, probability times troops left)
+    rows: Dict[int, List[Tuple[float, float]]] = {}
+    for d in range(1, defender + 1):
+        row = [(0.0, 0.0)] * (attacker + 1)
+        for a in range(MIN_ATTACK_TROOPS, attacker + 1):
+            p_win, win_troops = 0.0, 0.0
+            for a_loss, d_loss, conquered, p in roll_outcomes(min(a, 4), min(d, 3)):
+                if conquered:
+                    p_win += p
+                    win_troops += p * a
+                    continue
+                sub_win, sub_troops = (row if d_loss == 0 else rows[d - d_loss])[
+                    a - a_loss
+                ]
+                p_win += p * sub_win
+                win_troops += p * sub_troops
+            row[a] = (p_win, win_troops)
+        rows[d] = row
+        rows.pop(d - 3, None)
+    p_win, win_troops = rows[defender][attacker]
+    return p_win, win_troops / p_win if p_win else 0.0
+
+
+class AttackPlanner:
+    """Beam search over the attack sequence of one turn.
+
+    A state is the board after the attacks so far, assuming each battle is
+    fought until conquest and won, with the expected surviving troops moved
+    in and one left behind. Every attack multiplies the probability of
+    reaching the next state by its exact battle odds, and the plan value is
+    the sum over its attacks of that probability times the reward:
+
+    - territory: per conquered territory,
+    - continent: times the bonus of a continent completed or broken,
+    - card: for the first conquest of the turn,
+    - loss: per attacker troop expected to be lost in the battle.
+
+    States reached by different orders are merged by Zobrist hash, keeping
+    the better value. The best plan found at any depth is returned.
+    """
+
+    def __init__(
+        self,
+        compiled_map: Optional[CompiledMap] = None,
+        zobrist: Optional[ZobristKeys] = None,
+        beam_width: int = 8,
+        max_depth: int = 8,
+        min_odds: float = 0.4,
+        territory: float = 1.0,
+        continent: float = 1.5,
+        card: float = 3.0,
+        loss: float = 0.15,
+    ):
+        self.map = compiled_map or classic_map()
+        self.zobrist = zobrist or classic_zobrist()
+        self.beam_width = beam_width
+        self.max_depth = max_depth
+        self.min_odds = min_odds
+        self.territory_reward = territory
+        self.continent_reward = continent
+        self.card_reward = card
+        self.loss_cost = loss
+        self.neighbours: List[List[int]] = self.map.neighbour_lists
+        self.continents_of: List[List[int]] = [
+            [] for _ in range(self.map.n_territories)
+        ]
+        self.continent_members: List[List[int]] = []
+        for c, mask in enumerate(self.map.continent_masks):
+            members = [int(t) for t in mask.nonzero()[0]]
+            self.continent_members.append(members)
+            for territory in members:
+                self.continents_of[territory].append(c)
+        self.bonus = self.map.continent_bonus.tolist()
+        self.last_plan_time = 0.0
+        self.last_expansions = 0
+
+    def continent_gain(
+        self, owners: List[int], territory: int, player: int, previous: int
+    ) -> float:
+        """Bonus of continents completed by the player or broken for previous."""
+        gain = 0.0
+        for c in self.continents_of[territory]:
+            members = self.continent_members[c]
+            if all(owners[t] == player or t == territory for t in members):
+                gain += self.bonus[c]
+            elif all(owners[t] == previous for t in members):
+                gain += self.bonus[c] / 2
+        return gain
+
+    def plan(
+        self,
+        owners: Sequence[int],
+        troops: Sequence[int],
+        player: int,
+        already_card: bool = False,
+    ) -> List[Tuple[int, int]]:
+        """Best sequence of (origin, destination) attacks, possibly empty."""
+        start = time.perf_counter()
+        owners = [int(owner) for owner in owners]
+        troops = [int(n) for n in troops]
+        territory_key = self.zobrist.territory_key
+        key = 0
+        for territory in range(self.map.n_territories):
+            key ^= territory_key(territory, owners[territory], troops[territory])
+
+        # (value, probability, owners, troops, key, card gained, plan)
+        beam = [(0.0, 1.0, owners, troops, key, already_card, [])]
+        best_value, best_plan = 0.0, []
+        expansions = 0
+        for _ in range(self.max_depth):
+            children: Dict[int, tuple] = {}
+            for value, probability, owners, troops, key, card, plan in beam:
+                for origin in range(self.map.n_territories):
+                    if owners[origin] != player or troops[origin] < MIN_ATTACK_TROOPS:
+                        continue
+                    for destination in self.neighbours[origin]:
+                        previous = owners[destination]
+                        if previous == player:
+                            continue
+                        expansions += 1
+                        p_win, survivors = battle_odds(
+                            troops[origin], troops[destination]
+                        )
+                        if p_win < self.min_odds:
+                            continue
+                        reward = (
+                            self.territory_reward
+                            + self.continent_reward
+                            * self.continent_gain(owners, destination, player, previous)
+                            + (0.0 if card else self.card_reward)
+                        )
+                        lost = troops[origin] - p_win * survivors
+                        child_probability = probability * p_win
+                        child_value = (
+                            value
+                            + child_probability * reward
+                            - probability * self.loss_cost * lost
+                        )
+                        moved = max(int(round(survivors)) - 1, 1)
+                        child_key = (
+                            key
+                            ^ territory_key(origin, player, troops[origin])
+                            ^ territory_key(origin, player, 1)
+                            ^ territory_key(destination, previous, troops[destination])
+                            ^ territory_key(destination, player, moved)
+                        )
+                        existing = children.get(child_key)
+                        if existing is not None and existing[0] >= child_value:
+                            continue
+                        child_owners = owners.copy()
+                        child_troops = troops.copy()
+                        child_owners[destination] = player
+                        child_troops[destination] = moved
+                        child_troops[origin] = 1
+                        children[child_key] = (
+                            child_value,
+                            child_probability,
+                            child_owners,
+                            child_troops,
+                            child_key,
+                            True,
+                            plan + [(origin, destination)],
+                        )
+            if not children:
+                break
+            beam = sorted(children.values(), key=lambda node: node[0], reverse=True)
+            beam = beam[: self.beam_width]
+            if beam[0][0] > best_value:
+                best_value, best_plan = beam[0][0], beam[0][6]
+        self.last_plan_time = time.perf_counter() - start
+        self.last_expansions = expansions
+        return best_plan
+
+    def plan_board(self, board, player: int, already_card: bool = False):
+        """plan() on a Board, with country names."""
+        nodes = board.graph.nodes
+        territories = self.map.territories
+        plan = self.plan(
+            [nodes[country]["owner"] for country in territories],
+            [nodes[country]["troops"] for country in territories],
+            player,
+            already_card,
+        )
+        return [(territories[o], territories[d]) for o, d in plan]
+
+
+class BeamAttackAI(AnytimeAI):
+    """Anytime agent attacking along AttackPlanner plans.
+
+    The plan is recomputed before every roll, since each roll changes the
+    odds, and only its first attack is played. Once the player has conquered
+    a territory this turn the card is drawn, so later plans leave out the
+    card reward. Reinforcement and fortification use the built-in
+    heuristics.
+    """
+
+    def __init__(self, G, budgets=None, planner: Optional[AttackPlanner] = None):
+        super().__init__(G, budgets)
+        self.planner = planner or AttackPlanner()
+        # (board, turn, player) of the last attack search and the territories
+        # the player held at its first search of that turn
+        self.turn = None
+        self.turn_territories = 0
+
+    def search_attack(self, board, player, deadline):
+        territories = board.player_stats[player]["territories"]
+        turn = (id(board), board.game_turn, player)
+        if turn != self.turn or territories < self.turn_territories:
+            self.turn = turn
+            self.turn_territories = territories
+        already_card = territories > self.turn_territories
+        plan = self.planner.plan_board(board, player, already_card)
+        yield plan[0] if plan else None
@@ -0,0 +1,140 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.game_log import GameLog
+
+
+def setup_board_new():
+    from risk import Board
+
+    return lambda: Board(headless=True, log=GameLog.disabled()), 1, "board"
+
+
+def setup_board_reset():
+    from src.board_pool import BoardPool
+
+    board = BoardPool().acquire()
+    return board.reset, 1, "reset"
+
+
+def setup_game():
+    from src.board_pool import play_game
+
+    seeds = iter(range(1 << 30))
+    return lambda: play_game(next(seeds), max_turns=500), 1, "game"
+
+
+def setup_vectorized_step():
+    from src.vectorized import VectorizedGames
+
+    engine = VectorizedGames(1024, seed=0)
+    return engine.step, engine.n_games, "game step"
+
+
+def setup_resolve_battles():
+    from src.kernels import resolve_battles
+
+    rng = np.random.default_rng(0)
+    n = 100000
+    args = (
+        rng.integers(2, 12, n),
+        rng.integers(1, 8, n),
+        rng.integers(1, 7, (n, 3)),
+        rng.integers(1, 7, (n, 2)),
+    )
+    return lambda: resolve_battles(*args), n, "battle"
+
+
+def setup_kernels():
+    from src.kernels import cross_check
+
+    # Fails the suite before any timing if a kernel drifts from its reference
+    n_cases = cross_check()
+    return lambda: cross_check(n_cases=200), 220, "case"
+
+
+def setup_attack_plan():
+    from src.attack_planner import AttackPlanner
+    from src.board_pool import BoardPool
+
+    board = BoardPool().acquire(0)
+    board.populate_initial_board(animate=False)
+    steps = board.game_steps()
+    for _ in range(12):
+        next(steps)
+    planner = AttackPlanner()
+    player = board.active_players()[0]
+    return lambda: planner.plan_board(board, player), 1, "plan"
+
+
+def setup_evaluate():
+    from src.evaluator import Evaluator
+    from src.vectorized import VectorizedGames
+
+    engine = VectorizedGames(1024, seed=0)
+    engine.run(50)
+    evaluator = Evaluator()
+    state = (engine.owners, engine.troops, engine.cards, engine.current_player)
+    return lambda: evaluator.evaluate(*state), engine.n_games, "position"
+
+
+# name: setup() returning (function timed, operations per call, unit)
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable, int, str]]] = {
+    "board_new": setup_board_new,
+    "board_reset": setup_board_reset,
+    "game": setup_game,
+    "vectorized_step": setup_vectorized_step,
+    "resolve_battles": setup_resolve_battles,
+    "kernels": setup_kernels,
+    "attack_plan": setup_attack_plan,
+    "evaluate": setup_evaluate,
+}
+
+
+def measure(function: Callable, min_time: float = 0.2, repeat: int = 3) -> float:
+    """Best seconds per call over repeat rounds of at least min_time each."""
+    function()
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def run_suite(
+    names: Optional[List[str]] = None, min_time: float = 0.2, repeat: int = 3
+) -> List[dict]:
+    """Run the named benchmarks, all by default, and return one row each."""
+    rows = []
+    for name in names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark {name!r}")
+        function, operations, unit = BENCHMARKS[name]()
+        seconds = measure(function, min_time, repeat)
+        rows.append(
+            {
+                "name": name,
+                "unit": unit,
+                "seconds_per_call": seconds,
+                "per_second": operations / seconds,
+            }
+        )
+    return rows
+
+
+def format_rows(rows: List[dict]) -> str:
+    lines = [f"{'benchmark':<16} {'per call':>12} {'throughput':>28}"]
+    for row in rows:
+        per_call = f"{row['seconds_per_call'] * 1e3:.3f} ms"
+        throughput = f"{row['per_second']:,.0f} {row['unit']}/s"
+        lines.append(f"{row['name']:<16} {per_call:>12} {throughput:>28}")
+    return "\n".join(lines)
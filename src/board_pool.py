@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from src.game_log import GameLog
+
+
+class BoardPool:
+    """Headless Boards reused from game to game instead of built for each one.
+
+    acquire() hands out a board reset for a new game and only builds one when
+    every pooled board is in use; release() gives it back. Building a Board
+    creates the graph, deck, compiled map, Zobrist keys and incremental
+    tables, while Board.reset() only rewrites their contents, so a worker
+    playing many games allocates its boards once.
+    """
+
+    def __init__(self, log: Optional[GameLog] = None, analytics=None, max_size=8):
+        self.log = log or GameLog.disabled()
+        self.analytics = analytics
+        self.max_size = max_size
+        self.free: List = []
+        self.created = 0
+
+    def build(self):
+        # Imported here so that the pool does not need the GUI stack
+        from risk import Board
+
+        self.created += 1
+        return Board(headless=True, analytics=self.analytics, log=self.log)
+
+    def acquire(self, seed=None):
+        """An empty board, with random seeded as in Board.reset(seed)."""
+        board = self.free.pop() if self.free else self.build()
+        board.reset(seed)
+        return board
+
+    def release(self, board):
+        """Return a board; its agents and observers are dropped."""
+        board.agents.clear()
+        board.observers.clear()
+        if len(self.free) < self.max_size:
+            self.free.append(board)
+
+    @contextmanager
+    def board(self, seed=None):
+        """acquire() and release() around a block."""
+        board = self.acquire(seed)
+        try:
+            yield board
+        finally:
+            self.release(board)
+
+
+_worker_pool: Optional[BoardPool] = None
+
+
+def worker_pool() -> BoardPool:
+    """The BoardPool of the current process, created on first use.
+
+    Module state is not shared between processes, so every
+    multiprocessing worker gets its own pool and keeps it for its lifetime.
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = BoardPool()
+    return _worker_pool
+
+
+def play_game(
+    seed,
+    max_turns: Optional[int] = None,
+    stalemate_turns: Optional[int] = None,
+    adjudication="territories",
+) -> Tuple[int, int, Optional[str]]:
+    """Play one heuristic game on a pooled board.
+
+    Returns (winner, turns, end reason). A module level function, so it can
+    be passed to multiprocessing.Pool.map, e.g. with functools.partial for
+    the game limits.
+    """
+    with worker_pool().board(seed) as board:
+        board.populate_initial_board(animate=False)
+        board.game(
+            max_turns=max_turns,
+            stalemate_turns=stalemate_turns,
+            adjudication=adjudication,
+        )
+        return board.winner, board.game_turn, board.end_reason
@@ -0,0 +1,291 @@
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.board_pool import BoardPool
+from src.compiled_map import OWNER_DTYPE, TROOPS_DTYPE
+from src.game_log import GameLog
+from src.zobrist import JOKERS
+
+BOARD_MAGIC = b"RSKB"
+TOURNAMENT_MAGIC = b"RSKT"
+VERSION = 1
+TOURNAMENT_VERSION = 2
+
+# magic, version, game_turn, current_player, n_territories, n_cards, state_hash
+BOARD_HEADER = struct.Struct("<4sHiBHHQ")
+# magic, version, seed, n_games, n_players, n_in_flight, max_turns,
+# stalemate_turns (0 for no limit), adjudication code
+TOURNAMENT_HEADER = struct.Struct("<4sHqIBIIIB")
+# Codes of Board.adjudicate(by=...), functions are stored as CUSTOM
+ADJUDICATIONS = ("territories", "troops")
+CUSTOM_ADJUDICATION = 255
+# game_id, position, length of the board state
+IN_FLIGHT_HEADER = struct.Struct("<III")
+
+
+def write_atomic(path: str, data: bytes):
+    """Write a file so that readers see either the old or the new content."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def encode_board(board) -> bytes:
+    """Compact binary form of a Board state, see decode_board()."""
+    compiled_map = board.compiled_map
+    nodes = board.graph.nodes
+    cards = compiled_map.territories + list(JOKERS)
+    owners = np.array(
+        [nodes[country]["owner"] for country in compiled_map.territories], OWNER_DTYPE
+    )
+    troops = np.array(
+        [nodes[country]["troops"] for country in compiled_map.territories],
+        TROOPS_DTYPE,
+    )
+    card_owners = np.array(
+        [board.deck_of_cards[card]["card_owner"] for card in cards], OWNER_DTYPE
+    )
+    cards_traded = np.array(
+        [board.cards_traded[player] for player in sorted(board.cards_traded)],
+        np.int32,
+    )
+    header = BOARD_HEADER.pack(
+        BOARD_MAGIC,
+        VERSION,
+        board.game_turn,
+        board.current_player,
+        compiled_map.n_territories,
+        len(cards),
+        board.state_hash,
+    )
+    return b"".join(
+        (
+            header,
+            owners.tobytes(),
+            troops.tobytes(),
+            card_owners.tobytes(),
+            cards_traded.tobytes(),
+        )
+    )
+
+
+def decode_board(data: bytes, compiled_map) -> dict:
+    """Board.get_state() style dict, plus cards_traded and state_hash."""
+    magic, version, game_turn, current_player, n, n_cards, state_hash = (
+        BOARD_HEADER.unpack_from(data)
+    )
+    if magic != BOARD_MAGIC or version != VERSION:
+        raise ValueError("Not a board checkpoint")
+    if n != compiled_map.n_territories:
+        raise ValueError(
+            f"Checkpoint has {n} territories, the map {compiled_map.n_territories}"
+        )
+    offset = BOARD_HEADER.size
+    owners = np.frombuffer(data, OWNER_DTYPE, n, offset)
+    offset += owners.nbytes
+    troops = np.frombuffer(data, TROOPS_DTYPE, n, offset)
+    offset += troops.nbytes
+    card_owners = np.frombuffer(data, OWNER_DTYPE, n_cards, offset)
+    offset += card_owners.nbytes
+    cards_traded = np.frombuffer(data, np.int32, offset=offset)
+    cards = compiled_map.territories + list(JOKERS)
+    return {
+        "game_turn": game_turn,
+        "current_player": current_player,
+        "owner": dict(zip(compiled_map.territories, owners.tolist())),
+        "troops": dict(zip(compiled_map.territories, troops.tolist())),
+        "card_owner": dict(zip(cards, card_owners.tolist())),
+        "cards_traded": dict(enumerate(cards_traded.tolist(), 1)),
+        "state_hash": state_hash,
+    }
+
+
+def save_board(board, path: str):
+    write_atomic(path, encode_board(board))
+
+
+def load_board(board, path: str):
+    """Restore a Board saved with save_board() in place."""
+    with open(path, "rb") as f:
+        state = decode_board(f.read(), board.compiled_map)
+    board.load_state(state)
+    board.cards_traded.update(state["cards_traded"])
+
+
+class Tournament:
+    """Play many headless Board games with periodic checkpoints.
+
+    Every game_id has its own seed, so a game is fully determined by the
+    tournament seed, its id and the number of player turns played. The
+    checkpoint file holds the winner and length of every finished game and,
+    for a game in flight, its position and board state. Running again with
+    the same path resumes: finished games are skipped and an in-flight game is
+    replayed from its seed to the saved position, then checked against the
+    saved state before it continues. Games are played with the max_turns,
+    stalemate_turns and adjudication of Board.game_steps(), which the
+    checkpoint records so that a resume plays under the same limits.
+
+        tournament = Tournament(1000, "tournament.ckpt", seed=7, max_turns=500)
+        tournament.run()
+        tournament.winners
+    """
+
+    def __init__(
+        self,
+        n_games: int,
+        path: str,
+        seed: int = 0,
+        checkpoint_interval: float = 30.0,
+        quiet: bool = True,
+        max_turns: Optional[int] = None,
+        stalemate_turns: Optional[int] = None,
+        adjudication="territories",
+    ):
+        self.n_games = n_games
+        self.path = path
+        self.seed = seed
+        self.max_turns = max_turns
+        self.stalemate_turns = stalemate_turns
+        self.adjudication = adjudication
+        self.checkpoint_interval = checkpoint_interval
+        self.quiet = quiet
+        self.n_players = 6
+        # 0 while a game is not finished
+        self.winners = np.zeros(n_games, dtype=OWNER_DTYPE)
+        self.turns = np.zeros(n_games, dtype=np.int32)
+        self.in_flight: Dict[int, Tuple[int, bytes]] = {}
+        self.pool = BoardPool(GameLog.disabled() if quiet else GameLog())
+        self.last_checkpoint = time.monotonic()
+        if os.path.exists(path):
+            self.load()
+
+    def game_seed(self, game_id: int) -> str:
+        # String seeds are hashed with SHA-512, so nearby ids are unrelated
+        return f"{self.seed}:{game_id}"
+
+    def limits(self) -> Tuple[int, int, int]:
+        """max_turns, stalemate_turns and adjudication as stored in the header."""
+        if callable(self.adjudication):
+            adjudication = CUSTOM_ADJUDICATION
+        else:
+            adjudication = ADJUDICATIONS.index(self.adjudication)
+        return self.max_turns or 0, self.stalemate_turns or 0, adjudication
+
+    def game_steps(self, board, game_id: int):
+        return board.game_steps(
+            game_id=game_id,
+            max_turns=self.max_turns,
+            stalemate_turns=self.stalemate_turns,
+            adjudication=self.adjudication,
+        )
+
+    def completed(self) -> List[int]:
+        return np.flatnonzero(self.winners).tolist()
+
+    def encode(self) -> bytes:
+        parts = [
+            TOURNAMENT_HEADER.pack(
+                TOURNAMENT_MAGIC,
+                TOURNAMENT_VERSION,
+                self.seed,
+                self.n_games,
+                self.n_players,
+                len(self.in_flight),
+                *self.limits(),
+            ),
+            self.winners.tobytes(),
+            self.turns.tobytes(),
+        ]
+        for game_id, (position, state) in self.in_flight.items():
+            parts.append(IN_FLIGHT_HEADER.pack(game_id, position, len(state)))
+            parts.append(state)
+        return b"".join(parts)
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        magic, version, seed, n_games, _, n_in_flight, *limits = (
+            TOURNAMENT_HEADER.unpack_from(data)
+        )
+        if magic != TOURNAMENT_MAGIC or version != TOURNAMENT_VERSION:
+            raise ValueError(f"{self.path} is not a tournament checkpoint")
+        if (seed, n_games) != (self.seed, self.n_games):
+            raise ValueError(
+                f"{self.path} belongs to a tournament of {n_games} games "
+                f"with seed {seed}"
+            )
+        if tuple(limits) != self.limits():
+            max_turns, stalemate_turns, adjudication = limits
+            raise ValueError(
+                f"{self.path} was played with max_turns={max_turns or None}, "
+                f"stalemate_turns={stalemate_turns or None} and adjudication "
+                f"code {adjudication}"
+            )
+        offset = TOURNAMENT_HEADER.size
+        self.winners[:] = np.frombuffer(data, OWNER_DTYPE, n_games, offset)
+        offset += self.winners.nbytes
+        self.turns[:] = np.frombuffer(data, np.int32, n_games, offset)
+        offset += self.turns.nbytes
+        for _ in range(n_in_flight):
+            game_id, position, length = IN_FLIGHT_HEADER.unpack_from(data, offset)
+            offset += IN_FLIGHT_HEADER.size
+            self.in_flight[game_id] = (position, data[offset : offset + length])
+            offset += length
+
+    def checkpoint(self):
+        write_atomic(self.path, self.encode())
+        self.last_checkpoint = time.monotonic()
+
+    def new_board(self, game_id: int):
+        board = self.pool.acquire(self.game_seed(game_id))
+        board.populate_initial_board(animate=False)
+        return board
+
+    def restore(self, game_id: int):
+        """Replay an in-flight game to its saved position and verify it."""
+        position, state = self.in_flight[game_id]
+        board = self.new_board(game_id)
+        steps = self.game_steps(board, game_id)
+        for _ in range(position):
+            next(steps)
+        if encode_board(board) != state:
+            raise RuntimeError(
+                f"Replaying game {game_id} to position {position} did not "
+                "reproduce the checkpointed state"
+            )
+        return board, steps, position
+
+    def play(self, game_id: int):
+        if game_id in self.in_flight:
+            board, steps, position = self.restore(game_id)
+        else:
+            board = self.new_board(game_id)
+            steps = self.game_steps(board, game_id)
+            position = 0
+        for _ in steps:
+            position += 1
+            if time.monotonic() - self.last_checkpoint >= self.checkpoint_interval:
+                self.in_flight[game_id] = (position, encode_board(board))
+                self.checkpoint()
+        self.in_flight.pop(game_id, None)
+        self.winners[game_id] = board.winner
+        self.turns[game_id] = board.game_turn
+        self.pool.release(board)
+
+    def run(self, games: Optional[List[int]] = None):
+        """Play every unfinished game, or the given game ids, then checkpoint."""
+        games = range(self.n_games) if games is None else games
+        for game_id in games:
+            if self.winners[game_id]:
+                continue
+            self.play(game_id)
+            if time.monotonic() - self.last_checkpoint >= self.checkpoint_interval:
+                self.checkpoint()
+        self.checkpoint()
@@ -0,0 +1,264 @@
+"""Command line interface: python -m src.cli {play,simulate,bench,replay}.
+
+Only the standard library is imported up front; every subcommand imports
+what it needs when it runs, so `--help` and the headless subcommands never
+load matplotlib's Tk backend or pygame.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+MANIFEST = "simulate.json"
+LOG_LEVELS = ("debug", "info", "warning", "off")
+
+
+def game_seed(seed: int, game_id: int) -> str:
+    # Same per-game seeds as src.checkpoint.Tournament
+    return f"{seed}:{game_id}"
+
+
+def game_log(level: str):
+    from src import game_log
+
+    return game_log.GameLog(getattr(game_log, level.upper()))
+
+
+def play(args) -> int:
+    from risk import Board
+
+    if args.renderer == "pygame":
+        from src.pygame_renderer import PygameRenderer
+
+        board = Board(headless=True, log=game_log(args.log_level))
+        renderer = PygameRenderer(fps=args.fps)
+        board.add_observer(renderer.on_changes)
+        # The pauses of the game loop pace the window as plt.pause does
+        board.pause_handler = renderer.wait
+    else:
+        board = Board(log=game_log(args.log_level))
+        renderer = None
+    if args.human:
+        from src.human import HumanAgent, MatplotlibInput, PygameInput
+
+        if renderer is None:
+            human_input = MatplotlibInput(board)
+        else:
+            human_input = PygameInput(renderer)
+        for seat in args.human:
+            board.agents[seat] = HumanAgent(board.graph, human_input)
+    board.reset(None if args.seed is None else game_seed(args.seed, args.game))
+    board.populate_initial_board(animate=renderer is None)
+    board.pause(0.1)
+    board.game(max_turns=args.max_turns, stalemate_turns=args.stalemate_turns)
+    board.pause(0.1)
+    print(
+        f"Player {board.winner} wins after {board.game_turn} turns ({board.end_reason})"
+    )
+    if renderer is not None:
+        renderer.wait_closed()
+    return 0
+
+
+def simulate_game(settings: dict, game_id: int) -> dict:
+    """Play one game of a simulate run on a pooled board of this process."""
+    from src.board_pool import worker_pool
+    from src.results import board_game_record, board_starting_continents
+
+    with worker_pool().board(game_seed(settings["seed"], game_id)) as board:
+        board.populate_initial_board(animate=False)
+        start_continents = board_starting_continents(board)
+        board.game(
+            max_turns=settings["max_turns"],
+            stalemate_turns=settings["stalemate_turns"],
+        )
+        return board_game_record(board, game_id, start_continents)
+
+
+def simulate(args) -> int:
+    import functools
+    import multiprocessing
+
+    from src.results import ResultsSink
+
+    settings = {
+        "n_games": args.n_games,
+        "seed": args.seed,
+        "max_turns": args.max_turns,
+        "stalemate_turns": args.stalemate_turns,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, MANIFEST), "w") as file:
+        json.dump(settings, file, indent=2)
+
+    play_one = functools.partial(simulate_game, settings)
+    games = range(args.n_games)
+    start = time.perf_counter()
+    with ResultsSink(args.output, fmt=args.format) as sink:
+        if args.workers > 1:
+            chunksize = max(1, args.n_games // (args.workers * 8))
+            with multiprocessing.Pool(args.workers) as pool:
+                for record in pool.imap(play_one, games, chunksize):
+                    sink.write_game(record)
+        else:
+            for record in map(play_one, games):
+                sink.write_game(record)
+    elapsed = time.perf_counter() - start
+
+    summary = sink.aggregates.summary()
+    print(
+        f"{args.n_games} games in {elapsed:.1f}s "
+        f"({args.n_games / elapsed:.1f} games/s), results in {args.output}"
+    )
+    print(json.dumps(summary, indent=2, default=str))
+    return 0
+
+
+def bench(args) -> int:
+    from src.bench import format_rows, run_suite
+
+    rows = run_suite(args.benchmarks or None, args.min_time, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(format_rows(rows))
+    return 0
+
+
+def replay(args) -> int:
+    path = os.path.join(args.source, MANIFEST)
+    with open(path) as file:
+        settings = json.load(file)
+    if not 0 <= args.game < settings["n_games"]:
+        print(f"Game {args.game} is not in {path}", file=sys.stderr)
+        return 1
+    seed = game_seed(settings["seed"], args.game)
+    limits = {
+        "max_turns": settings["max_turns"],
+        "stalemate_turns": settings["stalemate_turns"],
+    }
+
+    if args.export is None:
+        from risk import Board
+
+        board = Board(log=game_log(args.log_level))
+        board.reset(seed)
+        board.populate_initial_board()
+        board.game(**limits)
+        board.pause(0.1)
+        print(f"Player {board.winner} wins after {board.game_turn} turns")
+        return 0
+
+    from src.board_pool import BoardPool
+
+    def state(board) -> dict:
+        nodes = board.graph.nodes
+        territories = board.compiled_map.territories
+        return {
+            "turn": board.game_turn,
+            "player": board.current_player,
+            "owners": [nodes[country]["owner"] for country in territories],
+            "troops": [nodes[country]["troops"] for country in territories],
+        }
+
+    with BoardPool().board(seed) as board, open(args.export, "w") as file:
+        board.populate_initial_board(animate=False)
+        file.write(json.dumps(state(board)) + "\n")
+        for _ in board.game_steps(game_id=args.game, **limits):
+            file.write(json.dumps(state(board)) + "\n")
+        result = {"winner": board.winner, "end_reason": board.end_reason}
+        file.write(json.dumps(result) + "\n")
+    print(f"Wrote {board.game_turn} turns of game {args.game} to {args.export}")
+    return 0
+
+
+def parser() -> argparse.ArgumentParser:
+    main_parser = argparse.ArgumentParser(
+        prog="python -m src.cli", description="Risk simulator"
+    )
+    subparsers = main_parser.add_subparsers(dest="command", required=True)
+
+    def add_game_limits(subparser, max_turns, stalemate_turns):
+        subparser.add_argument(
+            "--max-turns",
+            type=int,
+            default=max_turns,
+            help="adjudicate games after this many rounds",
+        )
+        subparser.add_argument(
+            "--stalemate-turns",
+            type=int,
+            default=stalemate_turns,
+            help="adjudicate games without a territory change for this many rounds",
+        )
+
+    play_parser = subparsers.add_parser("play", help="play a game in a window")
+    play_parser.add_argument(
+        "--seed", type=int, help="seed of the game, as in simulate --seed"
+    )
+    play_parser.add_argument(
+        "--game",
+        type=int,
+        default=0,
+        help="game id of the seed, plays game GAME of simulate --seed SEED",
+    )
+    play_parser.add_argument(
+        "--renderer", choices=("matplotlib", "pygame"), default="matplotlib"
+    )
+    play_parser.add_argument("--fps", type=int, default=60, help="pygame frame cap")
+    play_parser.add_argument(
+        "--human",
+        type=int,
+        action="append",
+        choices=range(1, 7),
+        metavar="SEAT",
+        help="seat played by clicking on the board, can be repeated",
+    )
+    play_parser.add_argument("--log-level", choices=LOG_LEVELS, default="info")
+    add_game_limits(play_parser, None, None)
+    play_parser.set_defaults(run=play)
+
+    simulate_parser = subparsers.add_parser(
+        "simulate", help="play headless games and write their results"
+    )
+    simulate_parser.add_argument("n_games", type=int)
+    simulate_parser.add_argument("--workers", type=int, default=1)
+    simulate_parser.add_argument("--seed", type=int, default=0)
+    simulate_parser.add_argument(
+        "--output", "-o", default="results", help="results directory"
+    )
+    simulate_parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    add_game_limits(simulate_parser, 500, 40)
+    simulate_parser.set_defaults(run=simulate)
+
+    bench_parser = subparsers.add_parser("bench", help="run the performance suite")
+    bench_parser.add_argument(
+        "benchmarks", nargs="*", help="benchmarks to run, all by default"
+    )
+    bench_parser.add_argument("--min-time", type=float, default=0.2)
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument("--json", action="store_true")
+    bench_parser.set_defaults(run=bench)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="view or export a game of a simulate run"
+    )
+    replay_parser.add_argument("source", help="results directory of simulate")
+    replay_parser.add_argument("--game", type=int, default=0, help="game id")
+    replay_parser.add_argument(
+        "--export", help="write the state after every turn as JSON lines instead"
+    )
+    replay_parser.add_argument("--log-level", choices=LOG_LEVELS, default="info")
+    replay_parser.set_defaults(run=replay)
+    return main_parser
+
+
+def main(argv=None) -> int:
+    args = parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
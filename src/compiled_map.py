@@ -0,0 +1,140 @@
+from collections import deque
+from functools import cached_property, lru_cache
+from typing import Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+
+from src.init_graph import init_graph
+from src.positions import continent_bonus, continents, positions
+
+# dtypes shared by every array-based state store (owners, troops, cards)
+OWNER_DTYPE = np.int8
+TROOPS_DTYPE = np.int32
+
+# Maps with more territories compute hop distances per source on demand
+# instead of keeping an all-pairs matrix
+DENSE_DISTANCE_LIMIT = 1024
+
+
+class CompiledMap:
+    """Array form of a board graph, indexed by territory id.
+
+    Territory ids follow the node order of the graph, so for the classic map
+    they match the order of init_graph() and of Board.graph.nodes.
+    """
+
+    def __init__(self, graph: nx.Graph):
+        self.territories: List[str] = list(graph.nodes)
+        self.index: Dict[str, int] = {
+            country: i for i, country in enumerate(self.territories)
+        }
+        self.n_territories = len(self.territories)
+
+        self.card_types = np.array(
+            [graph.nodes[country]["card_type"] for country in self.territories],
+            dtype=np.int8,
+        )
+
+        # Edge ids follow graph.edges; edge_index accepts both orientations
+        self.edges = np.array(
+            [(self.index[u], self.index[v]) for u, v in graph.edges], dtype=np.int32
+        ).reshape(-1, 2)
+        self.n_edges = len(self.edges)
+        self.edge_index: Dict[Tuple[int, int], int] = {}
+        for edge_id, (u, v) in enumerate(self.edges.tolist()):
+            self.edge_index[(u, v)] = edge_id
+            self.edge_index[(v, u)] = edge_id
+
+        self.edge_ids = np.full((self.n_territories, self.n_territories), -1, np.int32)
+        self.edge_ids[self.edges[:, 0], self.edges[:, 1]] = np.arange(self.n_edges)
+        self.edge_ids[self.edges[:, 1], self.edges[:, 0]] = np.arange(self.n_edges)
+
+        self.adjacency = np.zeros((self.n_territories, self.n_territories), dtype=bool)
+        self.adjacency[self.edges[:, 0], self.edges[:, 1]] = True
+        self.adjacency[self.edges[:, 1], self.edges[:, 0]] = True
+
+        # Neighbour lists padded with -1 to the maximum degree
+        self.neighbours = [np.flatnonzero(row) for row in self.adjacency]
+        self.degree = self.adjacency.sum(axis=1).astype(np.int32)
+        self.neighbour_table = np.full(
+            (self.n_territories, int(self.degree.max(initial=0))), -1, dtype=np.int32
+        )
+        for i, neighbours in enumerate(self.neighbours):
+            self.neighbour_table[i, : len(neighbours)] = neighbours
+        # Same rows in the order of graph.neighbors, which Board iterates in
+        self.graph_neighbour_table = np.full_like(self.neighbour_table, -1)
+        for i, country in enumerate(self.territories):
+            neighbours = [self.index[n] for n in graph.neighbors(country)]
+            self.graph_neighbour_table[i, : len(neighbours)] = neighbours
+
+        self.continents: List[str] = [
+            continent
+            for continent, countries in continents.items()
+            if all(country in self.index for country in countries)
+        ]
+        self.continent_masks = np.zeros(
+            (len(self.continents), self.n_territories), dtype=bool
+        )
+        for c, continent in enumerate(self.continents):
+            self.continent_masks[c, [self.index[x] for x in continents[continent]]] = (
+                True
+            )
+        self.continent_bonus = np.array(
+            [continent_bonus[continent] for continent in self.continents],
+            dtype=np.int32,
+        )
+        self.continent_sizes = self.continent_masks.sum(axis=1).astype(np.int32)
+
+        self.positions = np.array(
+            [positions.get(country, (0, 0)) for country in self.territories],
+            dtype=np.float64,
+        )
+
+        self.neighbour_lists: List[List[int]] = [
+            neighbours.tolist() for neighbours in self.neighbours
+        ]
+        self._distance_rows: Dict[int, np.ndarray] = {}
+
+    def bfs_distances(self, source: int) -> np.ndarray:
+        """Hop distance from source to every territory, -1 if unreachable."""
+        distances = [-1] * self.n_territories
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            territory = queue.popleft()
+            next_distance = distances[territory] + 1
+            for neighbour in self.neighbour_lists[territory]:
+                if distances[neighbour] < 0:
+                    distances[neighbour] = next_distance
+                    queue.append(neighbour)
+        return np.array(distances, dtype=np.int16)
+
+    @cached_property
+    def distance_matrix(self) -> np.ndarray:
+        """(N, N) all-pairs hop distances, only for maps up to DENSE_DISTANCE_LIMIT."""
+        if self.n_territories > DENSE_DISTANCE_LIMIT:
+            raise ValueError(
+                f"{self.n_territories} territories is too many for a distance "
+                "matrix, use hop_distances()"
+            )
+        matrix = np.stack([self.bfs_distances(t) for t in range(self.n_territories)])
+        matrix.flags.writeable = False
+        return matrix
+
+    def hop_distances(self, source: int) -> np.ndarray:
+        """Row of the distance matrix, or a cached BFS on large maps."""
+        if self.n_territories <= DENSE_DISTANCE_LIMIT:
+            return self.distance_matrix[source]
+        if source not in self._distance_rows:
+            self._distance_rows[source] = self.bfs_distances(source)
+        return self._distance_rows[source]
+
+    def distance(self, origin: int, destination: int) -> int:
+        return int(self.hop_distances(origin)[destination])
+
+
+@lru_cache(maxsize=None)
+def classic_map() -> CompiledMap:
+    """Compiled form of the classic 42 territory map, built once per process."""
+    return CompiledMap(init_graph())
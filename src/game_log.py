@@ -0,0 +1,119 @@
+import json
+import sys
+from typing import List, Optional, TextIO, Union
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING"}
+
+
+class TextSink:
+    """Human readable lines, by default on the current sys.stdout.
+
+    The message template is only formatted here, so events that no sink
+    writes never build a string. With buffer_lines the lines are written in
+    blocks instead of one write per event.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, buffer_lines: int = 0):
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.lines: List[str] = []
+
+    def write(self, level: int, event: str, template: str, fields: dict):
+        line = template.format(**fields)
+        if not self.buffer_lines:
+            (self.stream or sys.stdout).write(line + "\n")
+            return
+        self.lines.append(line)
+        if len(self.lines) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            (self.stream or sys.stdout).write("\n".join(self.lines) + "\n")
+            self.lines = []
+
+    def close(self):
+        self.flush()
+
+
+class JsonLinesSink:
+    """One JSON object per event: level, event name and the event fields."""
+
+    def __init__(self, target: Union[str, TextIO], buffer_lines: int = 1000):
+        self.owns_file = isinstance(target, str)
+        self.file = open(target, "w") if self.owns_file else target
+        self.buffer_lines = buffer_lines
+        self.lines: List[str] = []
+
+    def write(self, level: int, event: str, template: str, fields: dict):
+        record = {"level": LEVEL_NAMES.get(level, level), "event": event}
+        record.update(fields)
+        self.lines.append(json.dumps(record, separators=(",", ":")))
+        if len(self.lines) >= max(self.buffer_lines, 1):
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.file.write("\n".join(self.lines) + "\n")
+            self.file.flush()
+            self.lines = []
+
+    def close(self):
+        self.flush()
+        if self.owns_file:
+            self.file.close()
+
+
+class GameLog:
+    """Leveled game events with lazily formatted messages.
+
+    Callers check the flag of the level before building an event, so a
+    disabled level costs one attribute lookup:
+
+        if self.log.info_enabled:
+            self.log.emit(INFO, "reinforce", "Player {player} ...", player=player)
+
+    The default writes INFO events to stdout like the former prints.
+    GameLog.disabled() turns everything off for fast headless games.
+    """
+
+    def __init__(self, level: int = INFO, sinks: Optional[list] = None):
+        self.sinks = [TextSink()] if sinks is None else list(sinks)
+        self.set_level(level)
+
+    @classmethod
+    def disabled(cls) -> "GameLog":
+        return cls(OFF, [])
+
+    def set_level(self, level: int):
+        self.level = level
+        self.update_flags()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        self.update_flags()
+
+    def update_flags(self):
+        active = bool(self.sinks)
+        self.debug_enabled = active and self.level <= DEBUG
+        self.info_enabled = active and self.level <= INFO
+        self.warning_enabled = active and self.level <= WARNING
+
+    def emit(self, level: int, event: str, template: str, **fields):
+        if level < self.level:
+            return
+        for sink in self.sinks:
+            sink.write(level, event, template, fields)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,339 @@
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+import numpy as np
+
+from src.abstract_ai import AI
+from src.compiled_map import CompiledMap, classic_map
+from src.game_log import INFO
+
+# Radius in board coordinates of the nodes Board draws with node_size=2000,
+# i.e. sqrt(2000 / pi) points at 100 board units per inch of the board axes
+BOARD_NODE_RADIUS = math.sqrt(2000 / math.pi) * 100 / 72
+
+# Board.get_attacks only attacks from countries with more than 2 troops
+MIN_ATTACK_TROOPS = 3
+
+
+class HitGrid:
+    """Uniform grid over the territory circles for click hit testing.
+
+    Cells are one circle wide and every territory is listed in each cell its
+    circle overlaps, so a click only tests the few circles of its own cell,
+    whatever the size of the map. Overlapping circles resolve to the nearest
+    center.
+    """
+
+    def __init__(self, positions: np.ndarray, radius: float):
+        self.points: List[Tuple[float, float]] = [
+            (float(x), float(y)) for x, y in np.asarray(positions)
+        ]
+        self.radius = radius
+        self.cell = 2 * radius
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for territory, (x, y) in enumerate(self.points):
+            low_x, low_y = self.cell_of(x - radius, y - radius)
+            high_x, high_y = self.cell_of(x + radius, y + radius)
+            for cell_x in range(low_x, high_x + 1):
+                for cell_y in range(low_y, high_y + 1):
+                    self.cells.setdefault((cell_x, cell_y), []).append(territory)
+
+    def cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def hit(self, x: float, y: float) -> Optional[int]:
+        """Territory id whose circle contains (x, y), None if there is none."""
+        best, best_distance = None, self.radius**2
+        for territory in self.cells.get(self.cell_of(x, y), ()):
+            center_x, center_y = self.points[territory]
+            distance = (center_x - x) ** 2 + (center_y - y) ** 2
+            if distance <= best_distance:
+                best, best_distance = territory, distance
+        return best
+
+
+class LegalTargets:
+    """What a player may click in every phase of one position.
+
+    - reinforce: the player's territories.
+    - attack: origin -> adjacent enemy territories, for origins with enough
+      troops to attack.
+    - fortify: origins with troops to spare and, through fortify_targets(),
+      the other territories of their group of connected own territories.
+
+    Everything is computed in one pass over the map, so each click is a set
+    lookup and highlighting needs no further search.
+    """
+
+    def __init__(
+        self,
+        compiled_map: CompiledMap,
+        owners: List[int],
+        troops: List[int],
+        player: int,
+    ):
+        neighbours = compiled_map.neighbour_lists
+        own = [t for t in range(compiled_map.n_territories) if owners[t] == player]
+        self.reinforce: Set[int] = set(own)
+
+        self.attack: Dict[int, Set[int]] = {}
+        for territory in own:
+            if troops[territory] < MIN_ATTACK_TROOPS:
+                continue
+            enemies = {n for n in neighbours[territory] if owners[n] != player}
+            if enemies:
+                self.attack[territory] = enemies
+
+        # Fortification paths only go through own territories
+        self.groups: Dict[int, Set[int]] = {}
+        for territory in own:
+            if territory in self.groups:
+                continue
+            group = {territory}
+            queue = deque([territory])
+            while queue:
+                for neighbour in neighbours[queue.popleft()]:
+                    if owners[neighbour] == player and neighbour not in group:
+                        group.add(neighbour)
+                        queue.append(neighbour)
+            for member in group:
+                self.groups[member] = group
+        self.fortify_origins: Set[int] = {
+            territory
+            for territory in own
+            if troops[territory] > 1 and len(self.groups[territory]) > 1
+        }
+
+    def fortify_targets(self, origin: int) -> Set[int]:
+        return self.groups[origin] - {origin}
+
+
+class MatplotlibInput:
+    """Clicks on the board of a Board window; right click passes.
+
+    Legal targets are ringed by a single scatter artist whose offsets are
+    replaced, so highlighting costs one artist update per prompt.
+    """
+
+    radius = BOARD_NODE_RADIUS
+
+    def __init__(self, board, compiled_map: Optional[CompiledMap] = None):
+        self.board = board
+        self.map = compiled_map or board.compiled_map
+        self.clicks: deque = deque()
+        board.fig.canvas.mpl_connect("button_press_event", self.on_press)
+        self.markers = board.board_ax.scatter(
+            [],
+            [],
+            s=2000,
+            facecolors="none",
+            edgecolors="white",
+            linewidths=3,
+            zorder=4,
+        )
+
+    def on_press(self, event):
+        if event.inaxes is not self.board.board_ax:
+            return
+        self.clicks.append(None if event.button == 3 else (event.xdata, event.ydata))
+
+    def show(self, selected: Optional[int], targets: Iterable[int]):
+        self.board.clear_highlighted_country()
+        if selected is not None:
+            self.board.highlight_country(self.map.territories[selected])
+        self.markers.set_offsets(self.map.positions[list(targets)].reshape(-1, 2))
+
+    def wait_click(self) -> Optional[Tuple[float, float]]:
+        """Board coordinates of the next click, None for a right click."""
+        self.clicks.clear()
+        while not self.clicks:
+            self.board.pause(0.05)
+        return self.clicks.popleft()
+
+
+class PygameInput:
+    """Clicks on a src.pygame_renderer window; right click or Enter passes."""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.radius = renderer.node_radius
+
+    def show(self, selected: Optional[int], targets: Iterable[int]):
+        self.renderer.highlight(selected)
+        self.renderer.mark_targets(targets)
+        self.renderer.flush()
+
+    def wait_click(self) -> Optional[Tuple[float, float]]:
+        import pygame
+
+        pygame.event.clear(pygame.MOUSEBUTTONDOWN)
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.renderer.close()
+                    raise SystemExit
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                    return None
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 3:
+                        return None
+                    if event.button == 1:
+                        # Screen y grows downwards, board y upwards
+                        x, y = event.pos
+                        return x, self.renderer.size[1] - y
+            self.renderer.flush()
+            pygame.time.wait(int(1000 * self.renderer.frame_interval))
+
+
+class HumanAgent(AI):
+    """Agent playing the clicks of a person, for Board.agents.
+
+        board = Board()
+        board.agents[1] = HumanAgent(board.graph, MatplotlibInput(board))
+
+    - reinforce: every click on an own territory places one troop; a right
+      click places the rest as the built-in heuristic would.
+    - attack: click an origin, then an adjacent enemy to roll once. A right
+      click drops the origin, or ends the attacks when none is selected.
+    - fortify: click an origin, then a connected own territory to move all
+      but one troop there. A right click skips.
+
+    Clickable territories are ringed at every prompt.
+    """
+
+    def __init__(
+        self,
+        G: nx.Graph,
+        input,
+        compiled_map: Optional[CompiledMap] = None,
+    ):
+        super().__init__(G)
+        self.input = input
+        self.map = compiled_map or classic_map()
+        self.grid = HitGrid(self.map.positions, input.radius)
+
+    def legal(self, board, player: int) -> LegalTargets:
+        nodes = board.graph.nodes
+        territories = self.map.territories
+        return LegalTargets(
+            self.map,
+            [nodes[country]["owner"] for country in territories],
+            [nodes[country]["troops"] for country in territories],
+            player,
+        )
+
+    def click(
+        self,
+        board,
+        prompt: str,
+        selected: Optional[int],
+        targets: Iterable[int],
+    ) -> Optional[int]:
+        """Wait for a click on one of targets, None for a pass."""
+        self.input.show(selected, targets)
+        if board.log.info_enabled:
+            board.log_event(INFO, "prompt", "{prompt}", prompt=prompt)
+        while True:
+            position = self.input.wait_click()
+            if position is None:
+                return None
+            territory = self.grid.hit(*position)
+            if territory is not None and territory in targets:
+                return territory
+
+    def reinforce(self, board, player: int):
+        player_countries = board.get_player_countries(player)
+        if not player_countries:
+            return
+        troops = board.get_bonus_troops(player) + board.cards_handler(player)
+        targets = self.legal(board, player).reinforce
+        while troops > 0:
+            territory = self.click(
+                board,
+                f"Player {player}: click to place 1 of {troops} troops, "
+                "right click to place the rest",
+                None,
+                targets,
+            )
+            if territory is None:
+                board.place_reinforcements(player, player_countries, troops)
+                break
+            country = self.map.territories[territory]
+            board.update_troops(country, board.graph.nodes[country]["troops"] + 1)
+            troops -= 1
+        self.input.show(None, ())
+
+    def attack(self, board, player: int):
+        already_card = False
+        origin = None
+        while True:
+            legal = self.legal(board, player)
+            if origin not in legal.attack:
+                origin = None
+            if not legal.attack:
+                break
+            if origin is None:
+                origin = self.click(
+                    board,
+                    f"Player {player}: click a country to attack from, "
+                    "right click to stop attacking",
+                    None,
+                    legal.attack,
+                )
+                if origin is None:
+                    break
+                continue
+            # Clicking another origin selects it instead
+            targets = legal.attack[origin] | set(legal.attack)
+            territory = self.click(
+                board,
+                f"Player {player}: click a country to attack from "
+                f"{self.map.territories[origin]}, right click to cancel",
+                origin,
+                targets,
+            )
+            if territory is None or territory in legal.attack:
+                origin = territory
+                continue
+            destination = self.map.territories[territory]
+            board.roll_attack_once(self.map.territories[origin], destination)
+            if board.graph.nodes[destination]["owner"] == player and not already_card:
+                board.draw_card(player)
+                already_card = True
+        self.input.show(None, ())
+
+    def fortify(self, board, player: int):
+        legal = self.legal(board, player)
+        origin = None
+        while legal.fortify_origins:
+            if origin is None:
+                origin = self.click(
+                    board,
+                    f"Player {player}: click a country to fortify from, "
+                    "right click to skip",
+                    None,
+                    legal.fortify_origins,
+                )
+                if origin is None:
+                    break
+                continue
+            territory = self.click(
+                board,
+                f"Player {player}: click where to move the troops of "
+                f"{self.map.territories[origin]}, right click to cancel",
+                origin,
+                legal.fortify_targets(origin),
+            )
+            if territory is None:
+                origin = None
+                continue
+            country = self.map.territories[origin]
+            board.fortify_graph(
+                country,
+                self.map.territories[territory],
+                board.graph.nodes[country]["troops"] - 1,
+            )
+            break
+        self.input.show(None, ())
@@ -0,0 +1,345 @@
+"""Array kernels for the innermost loops of the game.
+
+Board.roll_attack_once and Board.cards_handler always run on resolve_battle
+and best_trade. Board.path_exists and Board.get_attacks run on path_exists
+and attack_pairs over the territory-indexed arrays of the board (see
+src/compiled_map.py) when Numba is installed, and keep their loops over the
+graph otherwise, which interpreted are faster than the array kernels. The
+kernels are written in the subset of Python that Numba compiles and are
+JIT-compiled on first call. Randomness never happens inside a kernel: dice
+are drawn by the caller, so compiled and Python versions give identical
+results for the same seed. cross_check() compares every kernel with an
+independent NumPy reference.
+"""
+
+import itertools
+from typing import Tuple
+
+import numpy as np
+
+from src.compiled_map import classic_map
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+JIT_ENABLED = numba is not None
+
+
+def jit(function):
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+def python_version(kernel):
+    """The uncompiled function behind a kernel."""
+    return getattr(kernel, "py_func", kernel)
+
+
+# Bonus of a set by card type: 0 joker, 1 infantry, 2 cavalry, 3 artillery
+SET_BONUS = np.array([0, 4, 6, 8], dtype=np.int32)
+MIXED_SET_BONUS = 10
+
+
+@jit
+def n_attack_dice(troops: int) -> int:
+    if troops > 3:
+        return 3
+    if troops == 3:
+        return 2
+    return 1
+
+
+@jit
+def n_defend_dice(troops: int) -> int:
+    return 2 if troops > 1 else 1
+
+
+@jit
+def resolve_battle(
+    attacker: int, defender: int, attack_dice: np.ndarray, defend_dice: np.ndarray
+) -> Tuple[int, int, bool]:
+    """One roll of Board.roll_attack_once with pre-drawn dice.
+
+    attack_dice and defend_dice hold at least 3 and 2 values in 1..6; only
+    the first n_attack_dice / n_defend_dice are used. Returns the attacker
+    and defender troops afterwards and whether the last defender was beaten,
+    in which case the troops are from before the conquering move. The dice
+    are sorted in scalars, so a roll allocates no arrays.
+    """
+    n_attack = n_attack_dice(attacker)
+    n_defend = n_defend_dice(defender)
+    a0 = attack_dice[0]
+    a1 = attack_dice[1] if n_attack > 1 else 0
+    a2 = attack_dice[2] if n_attack > 2 else 0
+    if a1 > a0:
+        a0, a1 = a1, a0
+    if a2 > a1:
+        a1, a2 = a2, a1
+    if a1 > a0:
+        a0, a1 = a1, a0
+    d0 = defend_dice[0]
+    d1 = defend_dice[1] if n_defend > 1 else 0
+    if d1 > d0:
+        d0, d1 = d1, d0
+    for i in range(min(n_attack, n_defend)):
+        if attacker == 1:
+            break
+        if (a0 if i == 0 else a1) < (d0 if i == 0 else d1):
+            attacker -= 1
+        elif defender > 1:
+            defender -= 1
+        else:
+            return attacker, defender, True
+    return attacker, defender, False
+
+
+def resolve_battles(
+    attacker: np.ndarray,
+    defender: np.ndarray,
+    attack_dice: np.ndarray,
+    defend_dice: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """NumPy version of resolve_battle for one battle per row."""
+    n_attack = np.where(attacker > 3, 3, np.where(attacker == 3, 2, 1))
+    n_defend = np.where(defender > 1, 2, 1)
+    attack_dice = attack_dice[:, :3].copy()
+    defend_dice = defend_dice[:, :2].copy()
+    attack_dice[np.arange(3) >= n_attack[:, None]] = 0
+    defend_dice[np.arange(2) >= n_defend[:, None]] = 0
+    attack_dice = -np.sort(-attack_dice, axis=1)
+    defend_dice = -np.sort(-defend_dice, axis=1)
+
+    attacker = attacker.copy()
+    defender = defender.copy()
+    conquered = np.zeros(attacker.size, dtype=bool)
+    rolling = np.ones(attacker.size, dtype=bool)
+    comparisons = np.minimum(n_attack, n_defend)
+    for i in range(2):
+        rolling &= (i < comparisons) & (attacker != 1)
+        attacker_loses = attack_dice[:, i] < defend_dice[:, i]
+        attacker -= rolling & attacker_loses
+        wins = rolling & ~attacker_loses
+        conquered |= wins & (defender <= 1)
+        defender -= wins & (defender > 1)
+        rolling &= ~conquered
+    return attacker, defender, conquered
+
+
+@jit
+def path_exists(
+    neighbour_table: np.ndarray,
+    owners: np.ndarray,
+    origin: int,
+    destination: int,
+    owner: int,
+) -> bool:
+    """DFS through territories of owner, as in Board.path_exists."""
+    n = owners.shape[0]
+    visited = np.zeros(n, dtype=np.bool_)
+    stack = np.empty(n, dtype=np.int64)
+    visited[origin] = True
+    stack[0] = origin
+    size = 1
+    while size > 0:
+        size -= 1
+        territory = stack[size]
+        if territory == destination:
+            return True
+        for neighbour in neighbour_table[territory]:
+            if neighbour < 0:
+                break
+            if not visited[neighbour] and owners[neighbour] == owner:
+                visited[neighbour] = True
+                stack[size] = neighbour
+                size += 1
+    return False
+
+
+@jit
+def attack_pairs(
+    neighbour_table: np.ndarray,
+    owners: np.ndarray,
+    troops: np.ndarray,
+    player: int,
+    min_troops: int = 3,
+) -> np.ndarray:
+    """(K, 2) (origin, destination) pairs as in Board.get_attacks.
+
+    Origins are the player's territories with at least min_troops troops,
+    destinations their enemy neighbours, ordered by territory id.
+    """
+    pairs = np.empty((neighbour_table.size, 2), dtype=np.int32)
+    count = 0
+    for territory in range(owners.shape[0]):
+        if owners[territory] != player or troops[territory] < min_troops:
+            continue
+        for neighbour in neighbour_table[territory]:
+            if neighbour < 0:
+                break
+            if owners[neighbour] != player:
+                pairs[count, 0] = territory
+                pairs[count, 1] = neighbour
+                count += 1
+    return pairs[:count]
+
+
+@jit
+def set_bonus(a: int, b: int, c: int) -> int:
+    """Bonus of three card types, as in Board.calculate_bonus_troops."""
+    if a != b and b != c and a != c:
+        return MIXED_SET_BONUS
+    if a == b and b == c:
+        return int(SET_BONUS[a])
+    return 0
+
+
+@jit
+def best_trade(card_types: np.ndarray) -> Tuple[int, int, int, int]:
+    """Indices into the hand and bonus of the set cards_handler trades.
+
+    Combinations are scanned in (i, j, k) order. The first one with the
+    highest bonus is traded, unless it holds a joker (type 0) and a second
+    combination gives the same bonus, in which case that one is. Returns -1
+    indices for hands of fewer than 3 cards.
+    """
+    n = card_types.shape[0]
+    first = (-1, -1, -1, -1)
+    second = (-1, -1, -1, -1)
+    for i in range(n):
+        for j in range(i + 1, n):
+            for k in range(j + 1, n):
+                bonus = set_bonus(card_types[i], card_types[j], card_types[k])
+                if bonus > first[3]:
+                    first = (i, j, k, bonus)
+                    second = (-1, -1, -1, -1)
+                elif bonus == first[3] and second[0] < 0:
+                    second = (i, j, k, bonus)
+    joker = (
+        card_types[first[0]] == 0
+        or card_types[first[1]] == 0
+        or card_types[first[2]] == 0
+    )
+    if first[0] >= 0 and joker and second[0] >= 0:
+        return second
+    return first
+
+
+def reference_path_exists(
+    adjacency: np.ndarray, owners: np.ndarray, origin: int, destination: int, owner: int
+) -> bool:
+    """NumPy reference of path_exists: grow the reachable set to a fixpoint."""
+    own = owners == owner
+    reached = np.zeros(owners.shape[0], dtype=bool)
+    reached[origin] = True
+    while True:
+        grown = reached | (adjacency[reached].any(axis=0) & own)
+        if grown[destination]:
+            return True
+        if np.array_equal(grown, reached):
+            return bool(reached[destination])
+        reached = grown
+
+
+def reference_attack_pairs(
+    adjacency: np.ndarray,
+    owners: np.ndarray,
+    troops: np.ndarray,
+    player: int,
+    min_troops: int = 3,
+) -> np.ndarray:
+    """NumPy reference of attack_pairs, in territory id order."""
+    origins = (owners == player) & (troops >= min_troops)
+    enemies = owners != player
+    return np.argwhere(adjacency & origins[:, None] & enemies[None, :]).astype(np.int32)
+
+
+def reference_best_trade(card_types: np.ndarray) -> Tuple[int, int, int, int]:
+    """NumPy reference of best_trade over the array of all combinations."""
+    n = card_types.shape[0]
+    if n < 3:
+        return -1, -1, -1, -1
+    combinations = np.array(list(itertools.combinations(range(n), 3)))
+    types = card_types[combinations]
+    mixed = (
+        (types[:, 0] != types[:, 1])
+        & (types[:, 1] != types[:, 2])
+        & (types[:, 0] != types[:, 2])
+    )
+    same = (types[:, 0] == types[:, 1]) & (types[:, 1] == types[:, 2])
+    bonus = np.where(mixed, MIXED_SET_BONUS, np.where(same, SET_BONUS[types[:, 0]], 0))
+    best = np.flatnonzero(bonus == bonus.max())
+    chosen = best[0]
+    if (types[chosen] == 0).any() and best.size > 1:
+        chosen = best[1]
+    return (*(int(c) for c in combinations[chosen]), int(bonus[chosen]))
+
+
+def versions(kernel) -> list:
+    """The compiled kernel and its Python version, or the Python one alone."""
+    if JIT_ENABLED:
+        return [kernel, python_version(kernel)]
+    return [kernel]
+
+
+def check(kernel, args, result, expected):
+    # Explicit raise, so the check also runs under python -O
+    if not np.array_equal(result, expected):
+        raise AssertionError(
+            f"{getattr(kernel, '__name__', kernel)} returned {result} instead of "
+            f"{expected} for {args}"
+        )
+
+
+def cross_check(seed: int = 0, n_cases: int = 2000, compiled_map=None) -> int:
+    """Compare every kernel with its NumPy reference on random states.
+
+    With Numba both the compiled kernels and their Python versions are
+    checked. Returns the number of cases checked and raises AssertionError on
+    any difference. src/bench.py runs it before timing the kernels.
+    """
+    compiled_map = compiled_map or classic_map()
+    rng = np.random.default_rng(seed)
+    table = compiled_map.neighbour_table
+    adjacency = compiled_map.adjacency
+    n = compiled_map.n_territories
+
+    attacker = rng.integers(2, 12, n_cases)
+    defender = rng.integers(1, 8, n_cases)
+    attack_dice = rng.integers(1, 7, (n_cases, 3))
+    defend_dice = rng.integers(1, 7, (n_cases, 2))
+    batch = resolve_battles(attacker, defender, attack_dice, defend_dice)
+    for case in range(n_cases):
+        args = (
+            int(attacker[case]),
+            int(defender[case]),
+            attack_dice[case],
+            defend_dice[case],
+        )
+        expected = tuple(int(array[case]) for array in batch)
+        for kernel in versions(resolve_battle):
+            check(kernel, args, kernel(*args), expected)
+
+    for _ in range(n_cases // 10):
+        owners = rng.integers(1, 4, n).astype(np.int8)
+        troops = rng.integers(1, 6, n).astype(np.int32)
+        player = int(rng.integers(1, 4))
+        origin, destination = (int(t) for t in rng.integers(0, n, 2))
+        owners[origin] = player
+        args = (owners, origin, destination, player)
+        expected = reference_path_exists(adjacency, *args)
+        for kernel in versions(path_exists):
+            check(kernel, args, kernel(table, *args), expected)
+
+        args = (owners, troops, player)
+        expected = reference_attack_pairs(adjacency, *args)
+        for kernel in versions(attack_pairs):
+            check(kernel, args, kernel(table, *args), expected)
+
+        hand = rng.integers(0, 4, int(rng.integers(3, 9)))
+        expected = reference_best_trade(hand)
+        for kernel in versions(best_trade):
+            check(kernel, hand, kernel(hand), expected)
+    return n_cases + n_cases // 10
@@ -0,0 +1,165 @@
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from src.compiled_map import OWNER_DTYPE, TROOPS_DTYPE, CompiledMap, classic_map
+
+
+def generate_initial_placements(
+    n_boards: int,
+    n_players: int = 6,
+    troops_per_player: int = 20,
+    seed: Union[int, np.random.Generator, None] = None,
+    compiled_map: Optional[CompiledMap] = None,
+    chunk_size: int = 65536,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Generate many starting boards at once.
+
+    Follows the rules of Board.populate_initial_board: every player gets one
+    random seed country with 1 troop, then in each round every player adds one
+    troop to a random country that is either theirs or still unowned, in seat
+    order, until everybody has troops_per_player troops.
+
+    Returns (owners, troops), both shaped (n_boards, n_territories).
+    """
+    compiled_map = compiled_map or classic_map()
+    rng = np.random.default_rng(seed)
+    n_territories = compiled_map.n_territories
+    if n_players > n_territories:
+        raise ValueError(
+            f"Cannot seed {n_players} players on {n_territories} territories"
+        )
+
+    owners = np.zeros((n_boards, n_territories), dtype=OWNER_DTYPE)
+    troops = np.zeros((n_boards, n_territories), dtype=TROOPS_DTYPE)
+    # Chunking bounds the size of the temporary random key arrays
+    for start in range(0, n_boards, chunk_size):
+        stop = min(start + chunk_size, n_boards)
+        _place_chunk(
+            owners[start:stop], troops[start:stop], n_players, troops_per_player, rng
+        )
+    return owners, troops
+
+
+def _place_chunk(
+    owners: np.ndarray,
+    troops: np.ndarray,
+    n_players: int,
+    troops_per_player: int,
+    rng: np.random.Generator,
+):
+    n_boards, n_territories = owners.shape
+    rows = np.arange(n_boards)
+
+    # The first n_players entries of a random permutation are the seed countries
+    seeds = np.argsort(rng.random((n_boards, n_territories)), axis=1)[:, :n_players]
+    owners[rows[:, None], seeds] = np.arange(1, n_players + 1, dtype=OWNER_DTYPE)
+    troops[rows[:, None], seeds] = 1
+
+    # Every player starts with 1 troop and adds one per round, so all players
+    # reach troops_per_player after the same number of rounds.
+    keys = np.empty((n_boards, n_territories), dtype=np.float32)
+    for _ in range(troops_per_player - 1):
+        for player in range(1, n_players + 1):
+            rng.random(dtype=np.float32, out=keys)
+            available = (owners == player) | (owners == 0)
+            keys[~available] = -1.0
+            selected = keys.argmax(axis=1)
+            owners[rows, selected] = player
+            troops[rows, selected] += 1
+
+
+def placement_to_state(
+    owners: np.ndarray,
+    troops: np.ndarray,
+    compiled_map: Optional[CompiledMap] = None,
+) -> dict:
+    """Convert one generated board into a state for Board.load_state()."""
+    compiled_map = compiled_map or classic_map()
+    return {
+        "owner": dict(zip(compiled_map.territories, owners.tolist())),
+        "troops": dict(zip(compiled_map.territories, troops.tolist())),
+    }
+
+
+def territories_per_player(owners: np.ndarray, n_players: int = 6) -> np.ndarray:
+    """Number of territories of each player, shaped (n_boards, n_players + 1).
+
+    Column 0 counts unowned territories.
+    """
+    n_boards = owners.shape[0]
+    offsets = np.arange(n_boards)[:, None] * (n_players + 1)
+    counts = np.bincount(
+        (owners.astype(np.int64) + offsets).ravel(),
+        minlength=n_boards * (n_players + 1),
+    )
+    return counts.reshape(n_boards, n_players + 1)
+
+
+def troops_per_player(
+    owners: np.ndarray, troops: np.ndarray, n_players: int = 6
+) -> np.ndarray:
+    """Total troops of each player, shaped (n_boards, n_players + 1)."""
+    n_boards = owners.shape[0]
+    offsets = np.arange(n_boards)[:, None] * (n_players + 1)
+    totals = np.bincount(
+        (owners.astype(np.int64) + offsets).ravel(),
+        weights=troops.ravel(),
+        minlength=n_boards * (n_players + 1),
+    )
+    return totals.reshape(n_boards, n_players + 1).astype(TROOPS_DTYPE)
+
+
+def continent_owners(
+    owners: np.ndarray, compiled_map: Optional[CompiledMap] = None
+) -> np.ndarray:
+    """Owner of every continent, 0 when it is split, shaped (n_boards, n_continents)."""
+    compiled_map = compiled_map or classic_map()
+    held = np.zeros((owners.shape[0], len(compiled_map.continents)), dtype=OWNER_DTYPE)
+    for c, mask in enumerate(compiled_map.continent_masks):
+        continent = owners[:, mask]
+        complete = (continent == continent[:, :1]).all(axis=1)
+        held[:, c] = np.where(complete, continent[:, 0], 0)
+    return held
+
+
+def opening_fairness(
+    owners: np.ndarray,
+    troops: np.ndarray,
+    n_players: int = 6,
+    compiled_map: Optional[CompiledMap] = None,
+) -> dict:
+    """Summary statistics of many starting boards, per seat."""
+    compiled_map = compiled_map or classic_map()
+    territories = territories_per_player(owners, n_players)[:, 1:]
+    held = continent_owners(owners, compiled_map)
+    continents_by_seat = np.stack(
+        [(held == player).sum(axis=1) for player in range(1, n_players + 1)], axis=1
+    )
+    return {
+        "territories_mean": territories.mean(axis=0),
+        "territories_std": territories.std(axis=0),
+        "unowned_mean": float((owners == 0).sum(axis=1).mean()),
+        "troops_per_territory_mean": (
+            troops_per_player(owners, troops, n_players)[:, 1:] / territories
+        ).mean(axis=0),
+        "continent_start_rate": continents_by_seat.mean(axis=0),
+    }
+
+
+def starting_continents(
+    owners: np.ndarray,
+    n_players: int = 6,
+    compiled_map: Optional[CompiledMap] = None,
+) -> np.ndarray:
+    """Continent index holding most territories of each seat, (boards, n_players)."""
+    compiled_map = compiled_map or classic_map()
+    owners = np.atleast_2d(owners)
+    per_continent = np.stack(
+        [
+            (owners[:, None, :] == player) & compiled_map.continent_masks
+            for player in range(1, n_players + 1)
+        ],
+        axis=1,
+    ).sum(axis=3)
+    return per_continent.argmax(axis=2)
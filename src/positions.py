@@ -88,3 +88,22 @@ continents = {
     ],
     "Australia": ["Indonesia", "New Guinea", "Western Australia", "Eastern Australia"],
 }
+
+continent_bonus = {
+    "North America": 5,
+    "South America": 2,
+    "Europe": 5,
+    "Africa": 3,
+    "Asia": 7,
+    "Australia": 2,
+}
+
+color_map = {
+    0: "white",  # "no owner"
+    1: "red",
+    2: "blue",
+    3: "green",
+    4: "yellow",
+    5: "purple",
+    6: "orange",
+}
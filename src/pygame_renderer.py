@@ -0,0 +1,215 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pygame
+
+from src.compiled_map import CompiledMap, classic_map
+from src.positions import color_map
+
+IMG_DIR = os.path.join(os.path.dirname(__file__), "..", "img")
+
+
+class PygameRenderer:
+    """Board renderer drawing only what changed since the last frame.
+
+    The background image and the edges are drawn once. Every territory is a
+    sprite with its owner circle and troop label at its position; changing an
+    owner or troop count only re-renders that sprite, and each frame updates
+    just the dirty rectangles of the screen. Frames are capped at fps, so any
+    number of events between two frames costs a single redraw; call flush()
+    after the last event to draw what is still pending.
+
+    It can be used as a Board observer:
+
+        renderer = PygameRenderer()
+        board = Board(headless=True)
+        board.add_observer(renderer.on_changes)
+
+    With offscreen=True the SDL dummy video driver is used, so it also runs
+    without a display. pygame comes from requirements.txt but Board never
+    imports it, so matplotlib sessions do not load it.
+    """
+
+    def __init__(
+        self,
+        compiled_map: Optional[CompiledMap] = None,
+        fps: int = 60,
+        node_radius: int = 22,
+        offscreen: bool = False,
+    ):
+        if offscreen:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        self.map = compiled_map or classic_map()
+        self.fps = fps
+        self.frame_interval = 1.0 / fps
+        self.last_frame = 0.0
+        self.frames = 0
+        self.node_radius = node_radius
+
+        pygame.init()
+        self.size = (1280, 720)
+        self.screen = pygame.display.set_mode(self.size)
+        pygame.display.set_caption("Risk Simulator")
+        if not offscreen:
+            pygame.display.set_icon(
+                pygame.image.load(os.path.join(IMG_DIR, "icon.png"))
+            )
+        self.font = pygame.font.Font(None, 24)
+
+        self.background = pygame.image.load(os.path.join(IMG_DIR, "risk_720p.png"))
+        self.background = pygame.transform.smoothscale(
+            self.background.convert(), self.size
+        )
+        self.draw_edges(self.background)
+
+        self.sprites = pygame.sprite.LayeredDirty()
+        self.territories = []
+        for territory in range(self.map.n_territories):
+            sprite = TerritorySprite(self, self.screen_position(territory))
+            self.territories.append(sprite)
+            self.sprites.add(sprite)
+        self.sprites.clear(self.screen, self.background)
+        self.screen.blit(self.background, (0, 0))
+        self.highlighted: Optional[int] = None
+        self.targets: List[int] = []
+        self.flush()
+
+    def screen_position(self, territory: int):
+        # Board positions have the origin at the bottom left, like matplotlib
+        x, y = self.map.positions[territory]
+        return int(x), int(self.size[1] - y)
+
+    def draw_edges(self, surface):
+        for u, v in self.map.edges.tolist():
+            start, end = self.screen_position(u), self.screen_position(v)
+            # The Alaska - Kamchatka edge wraps around the map
+            if abs(start[0] - end[0]) > self.size[0] // 2:
+                continue
+            pygame.draw.line(surface, (0, 0, 0), start, end, 1)
+
+    def set_territory(
+        self, territory: int, owner: Optional[int] = None, troops: Optional[int] = None
+    ):
+        self.territories[territory].update_state(owner, troops)
+
+    def set_state(self, owners: Sequence[int], troops: Sequence[int]):
+        """Set every territory, e.g. from a row of VectorizedGames arrays."""
+        for territory, (owner, n_troops) in enumerate(zip(owners, troops)):
+            self.set_territory(territory, int(owner), int(n_troops))
+        self.pump()
+
+    def highlight(self, territory: Optional[int]):
+        if self.highlighted is not None:
+            self.territories[self.highlighted].set_highlight(False)
+        self.highlighted = territory
+        if territory is not None:
+            self.territories[territory].set_highlight(True)
+
+    def mark_targets(self, territories: Iterable[int]):
+        """Ring the given territories, e.g. the legal clicks of a human player."""
+        for territory in self.targets:
+            self.territories[territory].set_targeted(False)
+        self.targets = list(territories)
+        for territory in self.targets:
+            self.territories[territory].set_targeted(True)
+
+    def on_changes(self, changes: Dict[str, dict]):
+        """Board observer: apply a change set and draw if a frame is due."""
+        for country, change in changes.items():
+            self.set_territory(
+                self.map.index[country], change.get("owner"), change.get("troops")
+            )
+        self.highlight(self.map.index[list(changes)[-1]])
+        self.pump()
+
+    def pump(self):
+        """Handle window events and draw a frame if the last one is 1/fps old."""
+        now = time.perf_counter()
+        if now - self.last_frame >= self.frame_interval:
+            self.flush()
+
+    def flush(self):
+        """Draw the dirty sprites now."""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.close()
+                raise SystemExit
+        rects = self.sprites.draw(self.screen)
+        pygame.display.update(rects)
+        self.last_frame = time.perf_counter()
+        self.frames += 1
+        return rects
+
+    def wait(self, seconds: float):
+        """Keep the window responsive for seconds, drawing at most fps frames."""
+        end = time.perf_counter() + seconds
+        while True:
+            self.flush()
+            remaining = end - time.perf_counter()
+            if remaining <= 0:
+                return
+            time.sleep(min(self.frame_interval, remaining))
+
+    def wait_closed(self):
+        """Keep drawing until the window is closed."""
+        try:
+            while True:
+                self.wait(self.frame_interval)
+        except SystemExit:
+            return
+
+    def save(self, path: str):
+        self.flush()
+        pygame.image.save(self.screen, path)
+
+    def close(self):
+        pygame.display.quit()
+
+
+class TerritorySprite(pygame.sprite.DirtySprite):
+    """Owner circle and troop label of one territory."""
+
+    def __init__(self, renderer: PygameRenderer, center):
+        super().__init__()
+        self.renderer = renderer
+        self.owner = 0
+        self.troops = 0
+        self.highlighted = False
+        self.targeted = False
+        size = 2 * renderer.node_radius + 4
+        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
+        self.rect = self.image.get_rect(center=center)
+        self.redraw()
+
+    def update_state(self, owner: Optional[int], troops: Optional[int]):
+        owner = self.owner if owner is None else owner
+        troops = self.troops if troops is None else troops
+        if (owner, troops) != (self.owner, self.troops):
+            self.owner, self.troops = owner, troops
+            self.redraw()
+
+    def set_highlight(self, highlighted: bool):
+        if highlighted != self.highlighted:
+            self.highlighted = highlighted
+            self.redraw()
+
+    def set_targeted(self, targeted: bool):
+        if targeted != self.targeted:
+            self.targeted = targeted
+            self.redraw()
+
+    def redraw(self):
+        radius = self.renderer.node_radius
+        center = (radius + 2, radius + 2)
+        self.image.fill((0, 0, 0, 0))
+        color = pygame.Color(color_map[self.owner])
+        color.a = 205 if self.highlighted else 155
+        pygame.draw.circle(self.image, color, center, radius)
+        if self.highlighted:
+            pygame.draw.circle(self.image, (0, 0, 0), center, radius, 4)
+        elif self.targeted:
+            pygame.draw.circle(self.image, (255, 255, 255), center, radius, 3)
+        label = self.renderer.font.render(str(self.troops), True, (0, 0, 0))
+        self.image.blit(label, label.get_rect(center=center))
+        self.dirty = 1
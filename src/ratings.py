@@ -0,0 +1,211 @@
+import itertools
+import math
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.board_pool import BoardPool
+
+# Glicko constant converting rating points to the logistic scale
+Q = math.log(10) / 400
+
+
+def g(rd: float) -> float:
+    return 1 / math.sqrt(1 + 3 * Q**2 * rd**2 / math.pi**2)
+
+
+class GlickoRatings:
+    """Glicko ratings updated after every finished game.
+
+    Every agent has a rating and a rating deviation (RD), the uncertainty of
+    the rating. A six player game is scored as the winner beating each other
+    agent at the table; agents holding several seats are counted once.
+    """
+
+    def __init__(
+        self,
+        initial_rating: float = 1500.0,
+        initial_rd: float = 350.0,
+        min_rd: float = 30.0,
+    ):
+        self.initial_rating = initial_rating
+        self.initial_rd = initial_rd
+        self.min_rd = min_rd
+        self.ratings: Dict[str, float] = {}
+        self.rds: Dict[str, float] = {}
+        self.games: Dict[str, int] = {}
+
+    def add(self, agent: str):
+        if agent not in self.ratings:
+            self.ratings[agent] = self.initial_rating
+            self.rds[agent] = self.initial_rd
+            self.games[agent] = 0
+
+    def expected(self, agent: str, opponent: str) -> float:
+        """Probability that agent beats opponent in a head to head comparison."""
+        difference = self.ratings[agent] - self.ratings[opponent]
+        return 1 / (1 + 10 ** (-g(self.rds[opponent]) * difference / 400))
+
+    def interval(self, agent: str, z: float = 1.96) -> Tuple[float, float]:
+        rating, rd = self.ratings[agent], self.rds[agent]
+        return rating - z * rd, rating + z * rd
+
+    def update(self, seats: List[str], winner_seat: int):
+        """Score one game; seats[i] is the agent at seat i + 1."""
+        agents = list(dict.fromkeys(seats))
+        for agent in agents:
+            self.add(agent)
+        if not winner_seat:
+            return
+        winner = seats[winner_seat - 1]
+        results = {}
+        for agent in agents:
+            if agent == winner:
+                results[agent] = [
+                    (opponent, 1.0) for opponent in agents if opponent != winner
+                ]
+            else:
+                results[agent] = [(winner, 0.0)]
+        # Compute every change from the ratings before the game
+        updates = {}
+        for agent, outcomes in results.items():
+            if not outcomes:
+                continue
+            rating, rd = self.ratings[agent], self.rds[agent]
+            d_inverse = 0.0
+            total = 0.0
+            for opponent, score in outcomes:
+                g_opponent = g(self.rds[opponent])
+                expected = self.expected(agent, opponent)
+                d_inverse += Q**2 * g_opponent**2 * expected * (1 - expected)
+                total += g_opponent * (score - expected)
+            precision = 1 / rd**2 + d_inverse
+            updates[agent] = (
+                rating + Q / precision * total,
+                max(math.sqrt(1 / precision), self.min_rd),
+            )
+        for agent, (rating, rd) in updates.items():
+            self.ratings[agent] = rating
+            self.rds[agent] = rd
+        for agent in agents:
+            self.games[agent] += 1
+
+    def summary(self) -> List[Tuple[str, float, float, int]]:
+        """(agent, rating, rd, games), best first."""
+        return sorted(
+            (
+                (agent, self.ratings[agent], self.rds[agent], self.games[agent])
+                for agent in self.ratings
+            ),
+            key=lambda row: row[1],
+            reverse=True,
+        )
+
+
+class AdaptiveScheduler:
+    """Pick the next game where it tells the most about the ranking.
+
+    Confidence-bound rule: among pairs of agents whose rating intervals still
+    overlap, the pair with the largest RD plays next, with the remaining
+    seats filled by the most uncertain other agents. Each agent gets the seat
+    it has played least, so seat advantages even out. Scheduling stops when
+    every overlapping pair is down to target_rd, i.e. the ranking is either
+    separated or known to the requested precision.
+    """
+
+    def __init__(
+        self,
+        agents: List[str],
+        n_seats: int = 6,
+        ratings: Optional[GlickoRatings] = None,
+        target_rd: float = 50.0,
+        z: float = 1.96,
+    ):
+        self.agents = list(agents)
+        self.n_seats = n_seats
+        self.ratings = ratings or GlickoRatings()
+        for agent in self.agents:
+            self.ratings.add(agent)
+        self.target_rd = target_rd
+        self.z = z
+        self.seat_counts: Dict[Tuple[str, int], int] = {}
+        self.games = 0
+
+    def overlaps(self, a: str, b: str) -> bool:
+        low_a, high_a = self.ratings.interval(a, self.z)
+        low_b, high_b = self.ratings.interval(b, self.z)
+        return low_a <= high_b and low_b <= high_a
+
+    def most_uncertain_pair(self) -> Optional[Tuple[str, str]]:
+        best, best_rd = None, self.target_rd
+        for a, b in itertools.combinations(self.agents, 2):
+            rd = max(self.ratings.rds[a], self.ratings.rds[b])
+            if rd > best_rd and self.overlaps(a, b):
+                best, best_rd = (a, b), rd
+        return best
+
+    def next_game(self) -> Optional[List[str]]:
+        """The agent of every seat for the next game, None when done."""
+        pair = self.most_uncertain_pair()
+        if pair is None:
+            return None
+        others = sorted(
+            (agent for agent in self.agents if agent not in pair),
+            key=lambda agent: self.ratings.rds[agent],
+            reverse=True,
+        )
+        lineup = list(
+            itertools.islice(itertools.cycle(list(pair) + others), self.n_seats)
+        )
+        seats: List[Optional[str]] = [None] * self.n_seats
+        for agent in lineup:
+            free = [
+                seat for seat in range(1, self.n_seats + 1) if seats[seat - 1] is None
+            ]
+            seat = min(free, key=lambda seat: self.seat_counts.get((agent, seat), 0))
+            seats[seat - 1] = agent
+        return seats
+
+    def record(self, seats: List[str], winner_seat: int):
+        self.ratings.update(seats, winner_seat)
+        for seat, agent in enumerate(seats, 1):
+            self.seat_counts[(agent, seat)] = self.seat_counts.get((agent, seat), 0) + 1
+        self.games += 1
+
+    def run(self, play: Callable[[List[str]], int], max_games: int = 10000) -> int:
+        """Play scheduled games until done or max_games; returns games played."""
+        played = 0
+        while played < max_games:
+            seats = self.next_game()
+            if seats is None:
+                break
+            self.record(seats, play(seats))
+            played += 1
+        return played
+
+
+def board_player(
+    agent_factories: Dict[str, Optional[Callable]],
+    seed: int = 0,
+    max_turns: Optional[int] = 200,
+    stalemate_turns: Optional[int] = 30,
+):
+    """A play function for AdaptiveScheduler.run using headless Boards.
+
+    agent_factories maps agent names to a callable taking the board graph and
+    returning an src.anytime.AnytimeAI, or None for the built-in heuristics.
+    Games are capped and adjudicated as in Board.game().
+    """
+    rng = random.Random(seed)
+    pool = BoardPool()
+
+    def play(seats: List[str]) -> int:
+        with pool.board(rng.getrandbits(64)) as board:
+            for seat, agent in enumerate(seats, 1):
+                factory = agent_factories[agent]
+                if factory is not None:
+                    board.agents[seat] = factory(board.graph)
+            board.populate_initial_board(animate=False)
+            board.game(max_turns=max_turns, stalemate_turns=stalemate_turns)
+            return board.winner
+
+    return play
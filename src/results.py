@@ -0,0 +1,283 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.placement import (
+    continent_owners,
+    starting_continents,
+    territories_per_player,
+    troops_per_player,
+)
+
+
+class WinRateBySeat:
+    def __init__(self, n_players: int = 6):
+        self.games = 0
+        self.wins = np.zeros(n_players + 1, dtype=np.int64)
+
+    def update(self, record: dict):
+        self.games += 1
+        self.wins[record["winner"]] += 1
+
+    def summary(self) -> Dict[int, float]:
+        return {
+            seat: self.wins[seat] / self.games if self.games else 0.0
+            for seat in range(1, len(self.wins))
+        }
+
+
+class WinRateByStartingContinent:
+    """How often a player wins given the continent they mostly started in."""
+
+    def __init__(self, n_players: int = 6):
+        self.n_players = n_players
+        self.starts: Dict[str, int] = {}
+        self.wins: Dict[str, int] = {}
+
+    def update(self, record: dict):
+        for seat in range(1, self.n_players + 1):
+            continent = record.get(f"start_continent_{seat}")
+            if not continent:
+                continue
+            self.starts[continent] = self.starts.get(continent, 0) + 1
+            if record["winner"] == seat:
+                self.wins[continent] = self.wins.get(continent, 0) + 1
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            continent: self.wins.get(continent, 0) / starts
+            for continent, starts in self.starts.items()
+        }
+
+
+class GameLengthHistogram:
+    """Game lengths in turns, in fixed width bins with an overflow bin."""
+
+    def __init__(self, bin_width: int = 5, n_bins: int = 60):
+        self.bin_width = bin_width
+        self.counts = np.zeros(n_bins + 1, dtype=np.int64)
+        self.total_turns = 0
+        self.games = 0
+        self.longest = 0
+
+    def update(self, record: dict):
+        turns = record["turns"]
+        self.counts[min(turns // self.bin_width, len(self.counts) - 1)] += 1
+        self.total_turns += turns
+        self.games += 1
+        self.longest = max(self.longest, turns)
+
+    def summary(self) -> dict:
+        return {
+            "mean": self.total_turns / self.games if self.games else 0.0,
+            "longest": self.longest,
+            "bin_width": self.bin_width,
+            "counts": self.counts.tolist(),
+        }
+
+
+class OnlineAggregates:
+    """Aggregates updated per finished game, without rereading written files."""
+
+    def __init__(self, n_players: int = 6):
+        self.by_seat = WinRateBySeat(n_players)
+        self.by_starting_continent = WinRateByStartingContinent(n_players)
+        self.game_length = GameLengthHistogram()
+
+    def update(self, record: dict):
+        self.by_seat.update(record)
+        self.by_starting_continent.update(record)
+        self.game_length.update(record)
+
+    def summary(self) -> dict:
+        return {
+            "win_rate_by_seat": self.by_seat.summary(),
+            "win_rate_by_starting_continent": self.by_starting_continent.summary(),
+            "game_length": self.game_length.summary(),
+        }
+
+
+class _Stream:
+    """Buffered rows of one record kind, written out in numbered chunk files."""
+
+    def __init__(self, directory: str, kind: str, fmt: str, chunk_rows: int):
+        self.directory = directory
+        self.kind = kind
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.rows: List[dict] = []
+        self.frames: List[pd.DataFrame] = []
+        self.buffered = 0
+        self.part = 0
+
+    def add_row(self, row: dict):
+        self.rows.append(row)
+        self.buffered += 1
+        if self.buffered >= self.chunk_rows:
+            self.flush()
+
+    def add_columns(self, columns: Dict[str, np.ndarray]):
+        frame = pd.DataFrame(columns)
+        self.frames.append(frame)
+        self.buffered += len(frame)
+        if self.buffered >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        frames = self.frames + ([pd.DataFrame(self.rows)] if self.rows else [])
+        chunk = pd.concat(frames, ignore_index=True)
+        path = os.path.join(self.directory, f"{self.kind}-{self.part:05d}.{self.fmt}")
+        if self.fmt == "parquet":
+            chunk.to_parquet(path, index=False)
+        else:
+            chunk.to_csv(path, index=False)
+        self.part += 1
+        self.rows, self.frames, self.buffered = [], [], 0
+
+
+class ResultsSink:
+    """Stream per-game and per-turn records to chunked CSV or Parquet files.
+
+    At most chunk_rows records per kind are kept in memory. Finished games
+    also update the online aggregates.
+
+        with ResultsSink("results") as sink:
+            board.game(sink=sink)
+        sink.aggregates.summary()
+
+    Parquet needs pyarrow or fastparquet, which are not in requirements.txt.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fmt: str = "csv",
+        chunk_rows: int = 50000,
+        n_players: int = 6,
+    ):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown results format {fmt!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.n_players = n_players
+        self.games = _Stream(directory, "games", fmt, chunk_rows)
+        self.turns = _Stream(directory, "turns", fmt, chunk_rows)
+        self.aggregates = OnlineAggregates(n_players)
+        self.games_written = 0
+
+    def write_game(self, record: dict):
+        self.games.add_row(record)
+        self.aggregates.update(record)
+        self.games_written += 1
+
+    def write_turn(self, record: dict):
+        self.turns.add_row(record)
+
+    def write_games(self, columns: Dict[str, np.ndarray]):
+        """Write many game records at once, one array per column."""
+        self.games.add_columns(columns)
+        frame = pd.DataFrame(columns)
+        for record in frame.to_dict("records"):
+            self.aggregates.update(record)
+        self.games_written += len(frame)
+
+    def write_turns(self, columns: Dict[str, np.ndarray]):
+        self.turns.add_columns(columns)
+
+    def flush(self):
+        self.games.flush()
+        self.turns.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def board_turn_record(board, game_id: int, player: int) -> dict:
+    """One per-turn record of a Board, taken after player's turn."""
+    record = {"game_id": game_id, "turn": board.game_turn, "player": player}
+    for seat, stats in board.calculate_player_stats().items():
+        record[f"troops_{seat}"] = stats["troops"]
+        record[f"territories_{seat}"] = stats["territories"]
+        record[f"continents_{seat}"] = len(board.get_player_continents(seat))
+        record[f"cards_traded_{seat}"] = board.cards_traded[seat]
+    return record
+
+
+def board_game_record(board, game_id: int, start_continents: Dict[int, str]) -> dict:
+    """The record of a finished Board game."""
+    record = {
+        "game_id": game_id,
+        "winner": board.winner,
+        "turns": board.game_turn,
+        "cards_traded": sum(board.cards_traded.values()),
+        "end_reason": board.end_reason,
+    }
+    for seat, continent in start_continents.items():
+        record[f"start_continent_{seat}"] = continent
+    return record
+
+
+def board_starting_continents(board) -> Dict[int, str]:
+    compiled_map = board.compiled_map
+    owners = [
+        board.graph.nodes[country]["owner"] for country in compiled_map.territories
+    ]
+    starts = starting_continents(np.array(owners), compiled_map=compiled_map)[0]
+    return {
+        seat: compiled_map.continents[c] for seat, c in enumerate(starts.tolist(), 1)
+    }
+
+
+def engine_turn_records(engine, games: Optional[np.ndarray] = None) -> dict:
+    """Per-turn columns for games of a VectorizedGames engine."""
+    if games is None:
+        games = np.arange(engine.n_games)
+    owners = engine.owners[games]
+    territories = territories_per_player(owners, engine.n_players)
+    troops = troops_per_player(owners, engine.troops[games], engine.n_players)
+    held = continent_owners(owners, engine.map)
+    columns = {
+        "game_id": engine.game_ids[games],
+        "turn": engine.game_turn[games],
+        "player": engine.current_player[games],
+    }
+    cards_traded = engine.cards_traded[games]
+    for seat in range(1, engine.n_players + 1):
+        columns[f"troops_{seat}"] = troops[:, seat]
+        columns[f"territories_{seat}"] = territories[:, seat]
+        columns[f"continents_{seat}"] = (held == seat).sum(axis=1)
+        columns[f"cards_traded_{seat}"] = cards_traded[:, seat]
+    return columns
+
+
+def engine_game_records(engine, games: np.ndarray) -> dict:
+    """Columns for games of a VectorizedGames engine that just finished."""
+    columns = {
+        "game_id": engine.game_ids[games],
+        "winner": engine.winner[games],
+        "turns": engine.game_turn[games],
+        "cards_traded": engine.cards_traded[games].sum(axis=1),
+        # The engine has no turn caps, its games only end by conquest
+        "end_reason": np.full(games.size, "conquest"),
+    }
+    starts = engine.starting_continents[games]
+    names = np.array(engine.map.continents)
+    for seat in range(1, engine.n_players + 1):
+        columns[f"start_continent_{seat}"] = names[starts[:, seat - 1]]
+    return columns
+
+
+def attach_engine(engine, sink: ResultsSink):
+    """Write a record for every game the engine finishes from now on."""
+    engine.finished_callbacks.append(
+        lambda games: sink.write_games(engine_game_records(engine, games))
+    )
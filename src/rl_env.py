@@ -0,0 +1,264 @@
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from src.compiled_map import CompiledMap
+from src.kernels import resolve_battle
+from src.vectorized import VectorizedGames
+
+REINFORCE, ATTACK, FORTIFY = 0, 1, 2
+
+
+class RiskEnv:
+    """Gym-style environment where a learned agent plays one seat.
+
+    The other seats are played by the built-in heuristics of the vectorized
+    engine. Observations are read-only NumPy views over the engine buffers, so
+    they are created once and update in place on every step:
+
+    - "owners", "troops": per territory id.
+    - "cards": owner of each card, territories first, then the two jokers.
+    - "phase": REINFORCE, ATTACK or FORTIFY.
+    - "reinforcements": troops still to place this turn.
+
+    Actions are indices into one flat space, valid ones are flagged in
+    info["action_mask"]:
+
+    - [0, N): reinforce a territory next to an enemy with one troop, the
+      territories VectorizedGames.reinforce places on.
+    - [N, N + 2E): attack along a directed edge, see attack_pairs. Like
+      Board.get_attacks the origin needs more than 2 troops.
+    - [N + 2E, N + 2E + N * N): fortify origin * N + destination through own
+      territories, moving all but one troop.
+    - The last action ends the attack phase, or skips fortification.
+    """
+
+    def __init__(
+        self,
+        agent_player: int = 1,
+        n_players: int = 6,
+        seed: Union[int, np.random.Generator, None] = None,
+        compiled_map: Optional[CompiledMap] = None,
+        max_turns: Optional[int] = None,
+    ):
+        self.engine = VectorizedGames(
+            1,
+            n_players,
+            seed=seed,
+            compiled_map=compiled_map,
+            auto_reset=False,
+        )
+        self.map = self.engine.map
+        self.agent_player = agent_player
+        self.max_turns = max_turns
+        self.game = np.zeros(1, dtype=np.int64)
+
+        n = self.map.n_territories
+        directed = np.concatenate([self.map.edges, self.map.edges[:, ::-1]])
+        self.attack_pairs = directed
+        self.attack_offset = n
+        self.fortify_offset = n + len(directed)
+        self.end_action = self.fortify_offset + n * n
+        self.n_actions = self.end_action + 1
+
+        self.phase = np.zeros(1, dtype=np.int8)
+        self.reinforcements = np.zeros(1, dtype=np.int32)
+        self.got_card = False
+        self.action_mask = np.zeros(self.n_actions, dtype=bool)
+
+        # Scratch buffers of update_action_mask, so stepping allocates no arrays
+        self.own = np.zeros(n, dtype=bool)
+        self.spare = np.zeros(n, dtype=bool)
+        self.enemy = np.zeros(n, dtype=np.float32)
+        self.enemy_neighbours = np.zeros(n, dtype=np.float32)
+        self.pair_origins = np.ascontiguousarray(directed[:, 0])
+        self.pair_destinations = np.ascontiguousarray(directed[:, 1])
+        self.pair_own = np.zeros(len(directed), dtype=bool)
+        self.pair_troops = np.zeros(len(directed), dtype=self.engine.troops.dtype)
+        self.pair_legal = np.zeros(len(directed), dtype=bool)
+        self.reach = np.zeros((n, n), dtype=bool)
+        self.closure = np.zeros((n, n), dtype=bool)
+        self.paths = np.zeros((n, n), dtype=np.float32)
+        self.path_counts = np.zeros((n, n), dtype=np.float32)
+        self.diagonal = np.diag_indices(n)
+        self.closure_steps = int(np.ceil(np.log2(n))) + 1
+        # Uniform draws and dice of one roll, 3 attack then 2 defence dice
+        self.dice_draws = np.zeros(5, dtype=np.float64)
+        self.dice = np.zeros(5, dtype=np.int8)
+        self.agent_players = np.full(1, agent_player, dtype=self.engine.owners.dtype)
+
+        self.observation = {
+            "owners": self.readonly(self.engine.owners[0]),
+            "troops": self.readonly(self.engine.troops[0]),
+            "cards": self.readonly(self.engine.cards[0]),
+            "phase": self.readonly(self.phase),
+            "reinforcements": self.readonly(self.reinforcements),
+        }
+        self.info = {"action_mask": self.readonly(self.action_mask)}
+
+    @staticmethod
+    def readonly(array: np.ndarray) -> np.ndarray:
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[dict, dict]:
+        if seed is not None:
+            self.engine.rng = np.random.default_rng(seed)
+        self.engine.reset()
+        self.play_opponents()
+        self.start_turn()
+        return self.observation, self.info
+
+    def step(self, action: int) -> Tuple[dict, float, bool, bool, dict]:
+        if not self.action_mask[action]:
+            raise ValueError(f"Action {action} is not legal in phase {self.phase[0]}")
+
+        if self.phase[0] == REINFORCE:
+            self.engine.troops[0, action] += 1
+            self.reinforcements[0] -= 1
+            if self.reinforcements[0] == 0:
+                self.phase[0] = ATTACK
+        elif self.phase[0] == ATTACK:
+            if action == self.end_action:
+                self.phase[0] = FORTIFY
+            else:
+                self.attack(*self.attack_pairs[action - self.attack_offset])
+        else:
+            if action != self.end_action:
+                origin, destination = divmod(
+                    action - self.fortify_offset, self.map.n_territories
+                )
+                moved = self.engine.troops[0, origin] - 1
+                self.engine.troops[0, origin] -= moved
+                self.engine.troops[0, destination] += moved
+            self.end_turn()
+
+        terminated = bool(self.engine.done[0]) or not self.agent_alive()
+        truncated = (
+            not terminated
+            and self.max_turns is not None
+            and self.engine.game_turn[0] > self.max_turns
+        )
+        reward = 0.0
+        if terminated:
+            reward = 1.0 if self.engine.winner[0] == self.agent_player else -1.0
+        self.update_action_mask()
+        return self.observation, reward, terminated, truncated, self.info
+
+    def attack(self, origin: int, destination: int):
+        """Roll once from origin to destination, moving in after a conquest."""
+        engine = self.engine
+        troops = engine.troops[0]
+        # Dice drawn into the preallocated buffers, floor(6u) + 1 is uniform
+        engine.rng.random(out=self.dice_draws)
+        np.multiply(self.dice_draws, 6, out=self.dice_draws)
+        np.floor(self.dice_draws, out=self.dice_draws)
+        np.copyto(self.dice, self.dice_draws, casting="unsafe")
+        np.add(self.dice, 1, out=self.dice)
+        attacker, defender, conquered = resolve_battle(
+            int(troops[origin]), int(troops[destination]), self.dice[:3], self.dice[3:]
+        )
+        if conquered:
+            left = attacker - 1
+            leave = engine.rng.integers(0, 2) if left > 3 else 0
+            troops[destination] = left - leave
+            troops[origin] = 1 + leave
+            engine.owners[0, destination] = self.agent_player
+            if not self.got_card:
+                engine.award_cards(self.game, self.agent_players)
+                self.got_card = True
+            # Ends the game when this was the last enemy territory
+            np.equal(engine.owners[0], self.agent_player, out=self.own)
+            if self.own.all():
+                engine.advance(self.game)
+        else:
+            troops[origin] = attacker
+            troops[destination] = defender
+
+    def agent_alive(self) -> bool:
+        return bool((self.engine.owners[0] == self.agent_player).any())
+
+    def start_turn(self):
+        if self.engine.done[0] or not self.agent_alive():
+            return
+        self.got_card = False
+        self.reinforcements[0] = self.engine.bonus_troops(
+            self.game
+        ) + self.engine.trade_cards(self.game)
+        self.phase[0] = REINFORCE
+        self.update_action_mask()
+        if not self.action_mask.any():
+            # As in VectorizedGames.reinforce, troops only go to territories
+            # next to an enemy and are dropped without one
+            self.reinforcements[0] = 0
+            self.phase[0] = ATTACK
+            self.update_action_mask()
+
+    def end_turn(self):
+        self.engine.advance(self.game)
+        self.play_opponents()
+        self.start_turn()
+
+    def play_opponents(self):
+        """Let the built-in heuristics play until it is the agent's turn again."""
+        engine = self.engine
+        while (
+            not engine.done[0]
+            and engine.current_player[0] != self.agent_player
+            and self.agent_alive()
+        ):
+            engine.reinforce(self.game)
+            engine.attack(self.game)
+            engine.fortify(self.game)
+            engine.advance(self.game)
+
+    def update_action_mask(self):
+        mask = self.action_mask
+        mask[:] = False
+        own = self.own
+        np.equal(self.engine.owners[0], self.agent_player, out=own)
+        if self.engine.done[0] or not own.any():
+            return
+        troops = self.engine.troops[0]
+        n = self.map.n_territories
+
+        if self.phase[0] == REINFORCE:
+            border = mask[:n]
+            np.logical_not(own, out=border)
+            np.copyto(self.enemy, border)
+            np.matmul(self.engine.adjacency, self.enemy, out=self.enemy_neighbours)
+            np.greater(self.enemy_neighbours, 0, out=border)
+            np.logical_and(border, own, out=border)
+            return
+
+        if self.phase[0] == ATTACK:
+            legal = self.pair_legal
+            troops.take(self.pair_origins, out=self.pair_troops)
+            np.greater(self.pair_troops, 2, out=legal)
+            own.take(self.pair_origins, out=self.pair_own)
+            np.logical_and(legal, self.pair_own, out=legal)
+            own.take(self.pair_destinations, out=self.pair_own)
+            np.logical_not(self.pair_own, out=self.pair_own)
+            np.logical_and(
+                legal, self.pair_own, out=mask[self.attack_offset : self.fortify_offset]
+            )
+        else:
+            # Transitive closure of the adjacency restricted to own territories
+            reach = self.reach
+            np.logical_and(own[:, None], own[None, :], out=reach)
+            np.logical_and(reach, self.map.adjacency, out=reach)
+            reach[self.diagonal] = own
+            for _ in range(self.closure_steps):
+                np.copyto(self.paths, reach)
+                np.matmul(self.paths, self.paths, out=self.path_counts)
+                np.greater(self.path_counts, 0, out=self.closure)
+                # reach only grows, so equal counts mean a fixed point
+                if np.count_nonzero(self.closure) == np.count_nonzero(reach):
+                    break
+                np.copyto(reach, self.closure)
+            np.greater(troops, 1, out=self.spare)
+            np.logical_and(reach, self.spare[:, None], out=reach)
+            reach[self.diagonal] = False
+            mask[self.fortify_offset : self.end_action] = reach.ravel()
+        mask[self.end_action] = True
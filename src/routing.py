@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.compiled_map import CompiledMap
+
+
+class FrontDistances:
+    """Per player hop distance of every own territory to the nearest front.
+
+    A multi-source BFS starts from the player's frontier territories (those
+    bordering an enemy) and only walks through the player's own territories,
+    like fortification paths. Results are cached per player until an owner
+    change touches that player's territories or their borders, so routing
+    troops toward the front is a table lookup.
+    """
+
+    def __init__(self, compiled_map: CompiledMap, owners: Sequence[int]):
+        self.map = compiled_map
+        self.neighbours: List[List[int]] = compiled_map.neighbour_lists
+        self.owners = [int(owner) for owner in owners]
+        self.cache: Dict[int, np.ndarray] = {}
+
+    def update_owner(self, territory: int, owner: int):
+        previous = self.owners[territory]
+        if previous == owner:
+            return
+        self.owners[territory] = owner
+        # Frontiers can only change for the two owners and the neighbours' owners
+        self.cache.pop(previous, None)
+        self.cache.pop(owner, None)
+        for neighbour in self.neighbours[territory]:
+            self.cache.pop(self.owners[neighbour], None)
+
+    def set_owners(self, owners: Sequence[int]):
+        self.owners = [int(owner) for owner in owners]
+        self.cache.clear()
+
+    def frontier(self, player: int) -> List[int]:
+        owners = self.owners
+        return [
+            territory
+            for territory, owner in enumerate(owners)
+            if owner == player
+            and any(owners[n] != player for n in self.neighbours[territory])
+        ]
+
+    def distances(self, player: int) -> np.ndarray:
+        """Hops from each territory to the player's front, -1 if not reachable.
+
+        Territories of other players are -1. Own territories cut off from
+        every front through own territories are -1 too.
+        """
+        if player in self.cache:
+            return self.cache[player]
+        owners = self.owners
+        distances = [-1] * self.map.n_territories
+        queue = deque(self.frontier(player))
+        for territory in queue:
+            distances[territory] = 0
+        while queue:
+            territory = queue.popleft()
+            next_distance = distances[territory] + 1
+            for neighbour in self.neighbours[territory]:
+                if distances[neighbour] < 0 and owners[neighbour] == player:
+                    distances[neighbour] = next_distance
+                    queue.append(neighbour)
+        result = np.array(distances, dtype=np.int16)
+        result.flags.writeable = False
+        self.cache[player] = result
+        return result
+
+    def distance(self, player: int, territory: int) -> int:
+        return int(self.distances(player)[territory])
+
+    def next_hop(self, player: int, territory: int) -> Optional[int]:
+        """Own neighbour one step closer to the front, None on or off the front."""
+        distances = self.distances(player)
+        if distances[territory] <= 0:
+            return None
+        for neighbour in self.neighbours[territory]:
+            if distances[neighbour] == distances[territory] - 1:
+                return neighbour
+        return None
+
+    def deepest(self, player: int, candidates: Sequence[int]) -> Optional[int]:
+        """The candidate furthest behind the front, e.g. a fortification origin."""
+        distances = self.distances(player)
+        best = max(candidates, key=lambda territory: distances[territory], default=None)
+        if best is None or distances[best] <= 0:
+            return None
+        return best
@@ -0,0 +1,200 @@
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.compiled_map import OWNER_DTYPE, TROOPS_DTYPE, classic_map
+from src.vectorized import VectorizedGames
+
+
+class SharedGameBatch:
+    """A batch of game states living in one shared memory segment.
+
+    Every field is a (slots x ...) array viewing the segment, so simulator
+    workers write states in place and a learner or analyzer process reads
+    them without copying or pickling. Each slot has a sequence counter used
+    as a seqlock: writers make it odd while a slot is being written and even
+    again afterwards, readers check that it did not move while they read.
+
+        batch = SharedGameBatch.create(1024)
+        worker = Process(target=simulate_into, args=(batch, range(512), 100))
+
+    Instances pickle by segment name, so they can be passed to processes.
+    """
+
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        n_slots: int,
+        n_territories: int,
+        n_cards: int,
+        owner: bool,
+    ):
+        self.shm = shm
+        self.n_slots = n_slots
+        self.n_territories = n_territories
+        self.n_cards = n_cards
+        self.owner = owner
+
+        arrays: Dict[str, np.ndarray] = {}
+        offset = 0
+        for field, dtype, shape in self.layout(n_slots, n_territories, n_cards):
+            dtype = np.dtype(dtype)
+            # Keep every field 8 byte aligned
+            offset = -(-offset // 8) * 8
+            arrays[field] = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+            offset += dtype.itemsize * int(np.prod(shape))
+        self.sequence = arrays["sequence"]
+        self.owners = arrays["owners"]
+        self.troops = arrays["troops"]
+        self.cards = arrays["cards"]
+        self.current_player = arrays["current_player"]
+        self.game_turn = arrays["game_turn"]
+
+    @staticmethod
+    def layout(n_slots: int, n_territories: int, n_cards: int) -> Tuple:
+        return (
+            ("sequence", np.uint64, (n_slots,)),
+            ("owners", OWNER_DTYPE, (n_slots, n_territories)),
+            ("troops", TROOPS_DTYPE, (n_slots, n_territories)),
+            ("cards", OWNER_DTYPE, (n_slots, n_cards)),
+            ("current_player", OWNER_DTYPE, (n_slots,)),
+            ("game_turn", np.int32, (n_slots,)),
+        )
+
+    @classmethod
+    def nbytes(cls, n_slots: int, n_territories: int, n_cards: int) -> int:
+        size = 0
+        for _, dtype, shape in cls.layout(n_slots, n_territories, n_cards):
+            size = -(-size // 8) * 8 + np.dtype(dtype).itemsize * int(np.prod(shape))
+        return size
+
+    @classmethod
+    def create(
+        cls,
+        n_slots: int,
+        n_territories: Optional[int] = None,
+        n_cards: Optional[int] = None,
+        name: Optional[str] = None,
+    ) -> "SharedGameBatch":
+        """Allocate a new zeroed segment. The creating process should unlink() it."""
+        n_territories = n_territories or classic_map().n_territories
+        n_cards = n_cards or n_territories + 2
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=cls.nbytes(n_slots, n_territories, n_cards)
+        )
+        batch = cls(shm, n_slots, n_territories, n_cards, owner=True)
+        batch.sequence[:] = 0
+        return batch
+
+    @classmethod
+    def attach(
+        cls, name: str, n_slots: int, n_territories: int, n_cards: int
+    ) -> "SharedGameBatch":
+        """Map an existing segment created by another process."""
+        try:
+            # Only the creator unlinks the segment (Python 3.13+)
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Older versions register it again with the resource tracker, which
+            # multiprocessing children share with their parent, so this is safe.
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, n_slots, n_territories, n_cards, owner=False)
+
+    def __reduce__(self):
+        return (
+            SharedGameBatch.attach,
+            (self.shm.name, self.n_slots, self.n_territories, self.n_cards),
+        )
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(
+        self,
+        slots: np.ndarray,
+        owners: np.ndarray,
+        troops: np.ndarray,
+        cards: np.ndarray,
+        current_player: np.ndarray,
+        game_turn: np.ndarray,
+    ):
+        """Publish states for the given slots; only one writer per slot."""
+        self.sequence[slots] += 1
+        self.owners[slots] = owners
+        self.troops[slots] = troops
+        self.cards[slots] = cards
+        self.current_player[slots] = current_player
+        self.game_turn[slots] = game_turn
+        self.sequence[slots] += 1
+
+    def publish(self, engine: VectorizedGames, slots: np.ndarray):
+        """Write every game of a vectorized engine to consecutive slots."""
+        self.write(
+            slots,
+            engine.owners,
+            engine.troops,
+            engine.cards,
+            engine.current_player,
+            engine.game_turn,
+        )
+
+    def begin_read(self, slot: int) -> int:
+        """Wait until the slot is not being written and return its sequence."""
+        while True:
+            sequence = int(self.sequence[slot])
+            if sequence % 2 == 0:
+                return sequence
+
+    def validate(self, slot: int, sequence: int) -> bool:
+        """True when the slot did not change since begin_read returned sequence."""
+        return int(self.sequence[slot]) == sequence
+
+    def read(self, slot: int) -> dict:
+        """Consistent copy of one slot, retrying while a writer is active."""
+        while True:
+            sequence = self.begin_read(slot)
+            state = {
+                "owners": self.owners[slot].copy(),
+                "troops": self.troops[slot].copy(),
+                "cards": self.cards[slot].copy(),
+                "current_player": int(self.current_player[slot]),
+                "game_turn": int(self.game_turn[slot]),
+                "sequence": sequence,
+            }
+            if self.validate(slot, sequence):
+                return state
+
+    def stable_slots(self, sequences: np.ndarray) -> np.ndarray:
+        """Slots whose counters are even and equal to sequences taken earlier.
+
+        Lets a reader work directly on the shared views for a whole batch:
+        take sequence.copy(), compute, then keep only the stable slots.
+        """
+        return (sequences % 2 == 0) & (self.sequence == sequences)
+
+    def close(self):
+        # Views must be dropped before the buffer can be released
+        self.sequence = self.owners = self.troops = self.cards = None
+        self.current_player = self.game_turn = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+def simulate_into(
+    batch: SharedGameBatch,
+    slots,
+    n_steps: int,
+    seed: Optional[int] = None,
+):
+    """Worker entry point: play len(slots) games, publishing after every step."""
+    slots = np.asarray(slots)
+    engine = VectorizedGames(len(slots), seed=seed)
+    batch.publish(engine, slots)
+    for _ in range(n_steps):
+        engine.step()
+        batch.publish(engine, slots)
@@ -0,0 +1,234 @@
+import json
+import queue
+import socket
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.compiled_map import CompiledMap, classic_map
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class _Client:
+    """One connected viewer with its own bounded queue and sender thread."""
+
+    def __init__(self, server: "SpectatorServer", sock: socket.socket):
+        self.server = server
+        self.sock = sock
+        self.queue: "queue.Queue[Optional[bytes]]" = queue.Queue(server.queue_size)
+        self.resyncs = 0
+        self.alive = True
+        self.thread = threading.Thread(target=self.send_loop, daemon=True)
+
+    def offer(self, data: bytes):
+        """Queue a message, or replace the backlog with a keyframe when full."""
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            self.resync()
+
+    def resync(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.resyncs += 1
+        self.queue.put_nowait(self.server.keyframe())
+
+    def send_loop(self):
+        try:
+            while self.alive:
+                data = self.queue.get()
+                if data is None:
+                    break
+                self.sock.sendall(data)
+        except OSError:
+            pass
+        self.server.remove_client(self)
+
+    def close(self):
+        self.alive = False
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class SpectatorServer:
+    """Broadcast game updates to any number of viewers on localhost.
+
+    The protocol is newline delimited JSON over TCP. A client first receives a
+    keyframe with the owners and troops of every territory, then deltas with
+    only the changed owners and troops keyed by territory id:
+
+        {"type": "keyframe", "seq": 0, "owners": [...], "troops": [...]}
+        {"type": "delta", "seq": 1, "owners": {"12": 3}, "troops": {"12": 2}}
+
+    A keyframe is also broadcast every keyframe_interval deltas. Each client
+    has a bounded queue; when it is full the client's backlog is dropped and
+    replaced by a keyframe, so a slow viewer only skips updates and never
+    blocks the game.
+
+        server = SpectatorServer(port=8765)
+        board = Board(headless=True)
+        board.add_observer(server.on_changes)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        compiled_map: Optional[CompiledMap] = None,
+        queue_size: int = 256,
+        keyframe_interval: int = 200,
+    ):
+        self.map = compiled_map or classic_map()
+        self.queue_size = queue_size
+        self.keyframe_interval = keyframe_interval
+        self.owners = [0] * self.map.n_territories
+        self.troops = [0] * self.map.n_territories
+        self.seq = 0
+        self.since_keyframe = 0
+        self.clients: List[_Client] = []
+        self.lock = threading.Lock()
+
+        self.listener = socket.create_server((host, port))
+        self.address = self.listener.getsockname()
+        self.running = True
+        self.accept_thread = threading.Thread(target=self.accept_loop, daemon=True)
+        self.accept_thread.start()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _Client(self, sock)
+            with self.lock:
+                client.queue.put_nowait(self.keyframe())
+                self.clients.append(client)
+            client.thread.start()
+
+    def remove_client(self, client: _Client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def keyframe(self) -> bytes:
+        return encode(
+            {
+                "type": "keyframe",
+                "seq": self.seq,
+                "owners": self.owners,
+                "troops": self.troops,
+            }
+        )
+
+    def broadcast(self, data: bytes):
+        with self.lock:
+            for client in self.clients:
+                client.offer(data)
+
+    def publish_delta(self, owners: Dict[int, int], troops: Dict[int, int]):
+        """Send the changed owners and troops, keyed by territory id."""
+        if not owners and not troops:
+            return
+        with self.lock:
+            for territory, owner in owners.items():
+                self.owners[territory] = owner
+            for territory, n_troops in troops.items():
+                self.troops[territory] = n_troops
+            self.seq += 1
+        self.broadcast(
+            encode(
+                {"type": "delta", "seq": self.seq, "owners": owners, "troops": troops}
+            )
+        )
+        self.since_keyframe += 1
+        if self.since_keyframe >= self.keyframe_interval:
+            self.since_keyframe = 0
+            with self.lock:
+                data = self.keyframe()
+            self.broadcast(data)
+
+    def on_changes(self, changes: Dict[str, dict]):
+        """Board observer."""
+        owners, troops = {}, {}
+        for country, change in changes.items():
+            territory = self.map.index[country]
+            if "owner" in change:
+                owners[territory] = change["owner"]
+            if "troops" in change:
+                troops[territory] = change["troops"]
+        self.publish_delta(owners, troops)
+
+    def publish_state(self, owners: Sequence[int], troops: Sequence[int]):
+        """Send the difference to a full state, e.g. a row of VectorizedGames."""
+        owners, troops = np.asarray(owners), np.asarray(troops)
+        changed_owners = np.flatnonzero(owners != self.owners)
+        changed_troops = np.flatnonzero(troops != self.troops)
+        self.publish_delta(
+            {int(t): int(owners[t]) for t in changed_owners},
+            {int(t): int(troops[t]) for t in changed_troops},
+        )
+
+    def close(self):
+        self.running = False
+        self.listener.close()
+        with self.lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.close()
+
+
+class SpectatorClient:
+    """Connect to a SpectatorServer and keep a copy of the board state.
+
+    for message in SpectatorClient(server.address):
+        ...
+    """
+
+    def __init__(self, address, timeout: Optional[float] = None):
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.file = self.sock.makefile("rb")
+        self.owners: List[int] = []
+        self.troops: List[int] = []
+        self.seq = -1
+        self.keyframes = 0
+
+    def apply(self, message: dict):
+        if message["type"] == "keyframe":
+            self.owners = list(message["owners"])
+            self.troops = list(message["troops"])
+            self.keyframes += 1
+        else:
+            for territory, owner in message["owners"].items():
+                self.owners[int(territory)] = owner
+            for territory, troops in message["troops"].items():
+                self.troops[int(territory)] = troops
+        self.seq = message["seq"]
+
+    def __iter__(self) -> Iterator[dict]:
+        for line in self.file:
+            message = json.loads(line)
+            # Deltas older than the last keyframe are already included in it
+            if message["type"] == "delta" and message["seq"] <= self.seq:
+                continue
+            self.apply(message)
+            yield message
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
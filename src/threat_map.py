@@ -0,0 +1,101 @@
+from typing import List, Sequence, Tuple
+
+from src.compiled_map import CompiledMap
+
+
+class ThreatMap:
+    """Enemy pressure on every territory, maintained incrementally.
+
+    For each territory id it keeps the number of adjacent enemy territories,
+    the total enemy troops adjacent and the strongest adjacent enemy. A change
+    of troops or owner only touches the changed territory and its neighbours,
+    so all queries are O(1) lookups.
+    """
+
+    def __init__(
+        self,
+        compiled_map: CompiledMap,
+        owners: Sequence[int],
+        troops: Sequence[int],
+    ):
+        self.neighbours: List[List[int]] = [
+            neighbours.tolist() for neighbours in compiled_map.neighbours
+        ]
+        self.owners = [int(owner) for owner in owners]
+        self.troops = [int(n_troops) for n_troops in troops]
+        n = compiled_map.n_territories
+        self.enemy_neighbours = [0] * n
+        self.enemy_troops = [0] * n
+        self.strongest_troops = [0] * n
+        self.strongest_from = [-1] * n
+        for territory in range(n):
+            self.recompute(territory)
+
+    def reset(self, owners: Sequence[int], troops: Sequence[int]):
+        """Rebuild every entry for a new position, reusing the lists."""
+        for territory, (owner, n_troops) in enumerate(zip(owners, troops)):
+            self.owners[territory] = int(owner)
+            self.troops[territory] = int(n_troops)
+        for territory in range(len(self.owners)):
+            self.recompute(territory)
+
+    def recompute(self, territory: int):
+        """Rebuild the entries of one territory from its neighbours."""
+        owner = self.owners[territory]
+        count, total, strongest, strongest_from = 0, 0, 0, -1
+        for neighbour in self.neighbours[territory]:
+            if self.owners[neighbour] != owner:
+                count += 1
+                total += self.troops[neighbour]
+                if strongest_from < 0 or self.troops[neighbour] > strongest:
+                    strongest = self.troops[neighbour]
+                    strongest_from = neighbour
+        self.enemy_neighbours[territory] = count
+        self.enemy_troops[territory] = total
+        self.strongest_troops[territory] = strongest
+        self.strongest_from[territory] = strongest_from
+
+    def update_troops(self, territory: int, troops: int):
+        previous = self.troops[territory]
+        self.troops[territory] = troops
+        owner = self.owners[territory]
+        for neighbour in self.neighbours[territory]:
+            if self.owners[neighbour] == owner:
+                continue
+            self.enemy_troops[neighbour] += troops - previous
+            if troops > self.strongest_troops[neighbour]:
+                self.strongest_troops[neighbour] = troops
+                self.strongest_from[neighbour] = territory
+            elif self.strongest_from[neighbour] == territory and troops < previous:
+                self.recompute(neighbour)
+
+    def update_owner(self, territory: int, owner: int):
+        previous = self.owners[territory]
+        if previous == owner:
+            return
+        self.owners[territory] = owner
+        self.recompute(territory)
+        for neighbour in self.neighbours[territory]:
+            was_enemy = self.owners[neighbour] != previous
+            is_enemy = self.owners[neighbour] != owner
+            if was_enemy != is_enemy:
+                self.recompute(neighbour)
+
+    def is_frontline(self, territory: int) -> bool:
+        return self.enemy_neighbours[territory] > 0
+
+    def strongest_enemy(self, territory: int) -> Tuple[int, int]:
+        """(territory id, troops) of the strongest adjacent enemy, -1 if none."""
+        return self.strongest_from[territory], self.strongest_troops[territory]
+
+    def pressure(self, territory: int) -> int:
+        """Adjacent enemy troops minus own troops; positive means outnumbered."""
+        return self.enemy_troops[territory] - self.troops[territory]
+
+    def rank_frontline(self, territories: Sequence[int]) -> List[int]:
+        """Frontline territories among the given ones, most threatened first."""
+        return sorted(
+            (territory for territory in territories if self.is_frontline(territory)),
+            key=self.pressure,
+            reverse=True,
+        )
@@ -0,0 +1,407 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from src.compiled_map import OWNER_DTYPE, TROOPS_DTYPE, CompiledMap, classic_map
+from src.kernels import resolve_battles
+from src.placement import generate_initial_placements, starting_continents
+
+# Card bonus for three of a kind by card type, see Board.calculate_bonus_troops
+SET_BONUS = {1: 4, 2: 6, 3: 8}
+MIXED_SET_BONUS = 10
+
+
+class VectorizedGames:
+    """Many independent games advanced in lock-step with array operations.
+
+    State is held as (games x territories) arrays. A call to step() plays one
+    player turn in every live game: reinforce, attack, fortify and card
+    awards, each as a batched operation, following the rules and built-in
+    heuristics of Board.reinforce/attack/fortify. Finished games are recorded
+    and, with auto_reset, replaced by a fresh starting position.
+
+    Cards are indexed like src.zobrist.ZobristKeys.cards: territory ids first,
+    then the two jokers. cards[g, c] holds the owner of card c in game g.
+    """
+
+    def __init__(
+        self,
+        n_games: int,
+        n_players: int = 6,
+        seed: Union[int, np.random.Generator, None] = None,
+        compiled_map: Optional[CompiledMap] = None,
+        auto_reset: bool = True,
+        max_attack_rounds: int = 10000,
+    ):
+        self.map = compiled_map or classic_map()
+        self.n_games = n_games
+        self.n_players = n_players
+        self.auto_reset = auto_reset
+        self.max_attack_rounds = max_attack_rounds
+        self.rng = np.random.default_rng(seed)
+
+        n_territories = self.map.n_territories
+        self.card_types = np.concatenate(
+            [self.map.card_types, np.zeros(2, dtype=np.int8)]
+        )
+        self.card_type_masks = np.stack(
+            [self.card_types == card_type for card_type in range(4)]
+        )
+        self.n_cards = len(self.card_types)
+        self.valid_neighbours = self.map.neighbour_table >= 0
+        self.neighbour_index = np.where(
+            self.valid_neighbours, self.map.neighbour_table, 0
+        )
+        self.adjacency = self.map.adjacency.astype(np.float32)
+        self.continent_masks = self.map.continent_masks.astype(np.int32).T
+
+        self.owners = np.zeros((n_games, n_territories), dtype=OWNER_DTYPE)
+        self.troops = np.zeros((n_games, n_territories), dtype=TROOPS_DTYPE)
+        self.cards = np.zeros((n_games, self.n_cards), dtype=OWNER_DTYPE)
+        self.current_player = np.ones(n_games, dtype=OWNER_DTYPE)
+        self.game_turn = np.ones(n_games, dtype=np.int32)
+        # Sets traded by game and player, as Board.cards_traded; column 0 unused
+        self.cards_traded = np.zeros((n_games, n_players + 1), dtype=np.int32)
+        self.done = np.zeros(n_games, dtype=bool)
+        self.winner = np.zeros(n_games, dtype=OWNER_DTYPE)
+        self.game_ids = np.zeros(n_games, dtype=np.int64)
+        self.starting_continents = np.zeros((n_games, n_players), dtype=np.int8)
+        self.next_game_id = 0
+
+        # Optional src.analytics.HeatmapCounters
+        self.analytics = None
+
+        # Called with the indices of finished games before they are reset
+        self.finished_callbacks = []
+
+        # Totals over every game finished since construction
+        self.games_finished = 0
+        self.player_turns = 0
+        self.wins = np.zeros(n_players + 1, dtype=np.int64)
+        self.finished_lengths = []
+
+        self.reset()
+
+    def reset(self, games: Optional[np.ndarray] = None):
+        """Start new games at the given indices, all games by default."""
+        if games is None:
+            games = np.arange(self.n_games)
+        games = np.asarray(games)
+        if games.size == 0:
+            return
+        owners, troops = generate_initial_placements(
+            len(games), self.n_players, seed=self.rng, compiled_map=self.map
+        )
+        self.owners[games] = owners
+        self.troops[games] = troops
+        self.cards[games] = 0
+        self.current_player[games] = 1
+        self.game_turn[games] = 1
+        self.cards_traded[games] = 0
+        self.done[games] = False
+        self.winner[games] = 0
+        self.game_ids[games] = np.arange(
+            self.next_game_id, self.next_game_id + len(games)
+        )
+        self.next_game_id += len(games)
+        self.starting_continents[games] = starting_continents(
+            owners, self.n_players, self.map
+        )
+
+    def step(self) -> np.ndarray:
+        """Play one player turn in every live game.
+
+        Returns the indices of the games that finished during this step.
+        """
+        games = np.flatnonzero(~self.done)
+        if games.size:
+            self.reinforce(games)
+            self.attack(games)
+            self.fortify(games)
+            self.player_turns += games.size
+            if self.analytics:
+                self.analytics.record_troops(self.troops[games])
+        return self.advance(games)
+
+    def run(self, n_steps: int):
+        for _ in range(n_steps):
+            self.step()
+
+    # Batched helpers over a subset of games. Arrays returned are (len(games), ...)
+
+    def own_mask(self, games: np.ndarray) -> np.ndarray:
+        return self.owners[games] == self.current_player[games, None]
+
+    def enemy_adjacent(self, games: np.ndarray) -> np.ndarray:
+        """Territories with at least one neighbour owned by somebody else."""
+        enemy = (self.owners[games] != self.current_player[games, None]).astype(
+            np.float32
+        )
+        return (enemy @ self.adjacency) > 0
+
+    def random_choice(self, candidates: np.ndarray) -> np.ndarray:
+        """Uniformly pick one True column per row; rows without any return -1."""
+        keys = self.rng.random(candidates.shape, dtype=np.float32)
+        keys[~candidates] = -1.0
+        choice = keys.argmax(axis=1)
+        return np.where(candidates.any(axis=1), choice, -1)
+
+    def bonus_troops(self, games: np.ndarray) -> np.ndarray:
+        """Reinforcements from territories and continents, see Board.get_bonus_troops."""
+        own = self.own_mask(games)
+        territories = own.sum(axis=1)
+        in_continent = own.astype(np.int32) @ self.continent_masks
+        held = in_continent == self.map.continent_sizes
+        return np.maximum(3, territories // 3) + held.astype(np.int32) @ (
+            self.map.continent_bonus
+        )
+
+    def trade_cards(self, games: np.ndarray) -> np.ndarray:
+        """Trade the best set for players holding 5 or more cards.
+
+        Mirrors Board.cards_handler: a mixed set is worth 10, three of a kind
+        4/6/8, jokers are only used when no set without them is as good, and
+        every traded card of an owned territory adds 2 troops there.
+        """
+        hand = self.cards[games] == self.current_player[games, None]
+        bonus = np.zeros(games.size, dtype=np.int32)
+        trading = np.flatnonzero(hand.sum(axis=1) >= 5)
+        if trading.size == 0:
+            return bonus
+        games, hand = games[trading], hand[trading]
+        players = self.current_player[games, None]
+
+        counts = np.stack(
+            [(hand & mask).sum(axis=1) for mask in self.card_type_masks], axis=1
+        )
+        n_take = np.zeros((games.size, 4), dtype=np.int32)
+        traded_bonus = np.zeros(games.size, dtype=np.int32)
+        present = counts > 0
+        mixed = present.sum(axis=1) >= 3
+        all_real = mixed & present[:, 1:].all(axis=1)
+        n_take[all_real, 1:] = 1
+        with_joker = mixed & ~all_real
+        n_take[with_joker] = present[with_joker].astype(np.int32)
+        n_take[with_joker, 0] = 1
+        traded_bonus[mixed] = MIXED_SET_BONUS
+        # With 5 cards and fewer than 3 types present one real type has 3 cards
+        for card_type in (3, 2, 1):
+            triple = (traded_bonus == 0) & (counts[:, card_type] >= 3)
+            n_take[triple, card_type] = 3
+            traded_bonus[triple] = SET_BONUS[card_type]
+
+        take = np.zeros_like(hand)
+        for card_type, mask in enumerate(self.card_type_masks):
+            of_type = hand & mask
+            take |= of_type & (np.cumsum(of_type, axis=1) <= n_take[:, card_type, None])
+
+        n_territories = self.map.n_territories
+        own_cards = take[:, :n_territories] & (self.owners[games] == players)
+        self.troops[games] += 2 * own_cards.astype(TROOPS_DTYPE)
+        cards = self.cards[games]
+        cards[take] = 0
+        self.cards[games] = cards
+        self.cards_traded[games, self.current_player[games]] += 1
+        bonus[trading] = traded_bonus
+        return bonus
+
+    # Phases
+
+    def reinforce(self, games: np.ndarray):
+        """Split the reinforcements in random chunks over random border territories."""
+        remaining = self.bonus_troops(games) + self.trade_cards(games)
+        border = self.own_mask(games) & self.enemy_adjacent(games)
+        remaining[~border.any(axis=1)] = 0
+        rows = np.arange(games.size)
+        troops = self.troops[games]
+        while True:
+            active = np.flatnonzero(remaining > 0)
+            if active.size == 0:
+                break
+            amount = (self.rng.random(active.size) * remaining[active]).astype(
+                np.int32
+            ) + 1
+            target = self.random_choice(border[active])
+            troops[rows[active], target] += amount
+            remaining[active] -= amount
+        self.troops[games] = troops
+
+    def attack(self, games: np.ndarray):
+        """Attack the weakest adjacent enemy until no attack is left, one roll per round.
+
+        Like Board.attack the origin is then switched to the strongest own
+        neighbour of the target, a conquest moves all but 1 or 2 troops, and
+        the first conquest of the turn earns a card.
+        """
+        got_card = np.zeros(games.size, dtype=bool)
+        active = np.arange(games.size)
+        neighbour_index = self.neighbour_index
+        for _ in range(self.max_attack_rounds):
+            if active.size == 0:
+                break
+            g = games[active]
+            players = self.current_player[g]
+            owners = self.owners[g]
+            troops = self.troops[g]
+            rows = np.arange(g.size)
+
+            # Enemy territories next to an own territory with more than 2 troops
+            own = owners == players[:, None]
+            strong = (own & (troops > 2)).astype(np.float32)
+            targets = ~own & ((strong @ self.adjacency) > 0)
+            has_target = targets.any(axis=1)
+            if not has_target.all():
+                active, g, players, owners, troops, own, targets = (
+                    x[has_target]
+                    for x in (active, g, players, owners, troops, own, targets)
+                )
+                rows = np.arange(g.size)
+                if g.size == 0:
+                    break
+
+            # Weakest defender, ties broken at random. The origin is replaced
+            # below anyway, so only the destination has to be chosen here.
+            defence = troops + self.rng.random(targets.shape, dtype=np.float32)
+            defence[~targets] = np.inf
+            destination = defence.argmin(axis=1)
+
+            # Strongest own neighbour of the destination becomes the origin
+            candidates = neighbour_index[destination]
+            candidate_troops = np.where(
+                own[rows[:, None], candidates] & self.valid_neighbours[destination],
+                troops[rows[:, None], candidates],
+                -1,
+            )
+            origin = candidates[rows, candidate_troops.argmax(axis=1)]
+
+            attacker, defender, conquered = self.roll_battle(
+                troops[rows, origin], troops[rows, destination]
+            )
+            if self.analytics:
+                self.analytics.record_attacks(origin, destination)
+                self.analytics.record_conquests(destination[conquered])
+
+            # A conquest leaves 1 troop behind, sometimes 2 when there are plenty
+            left = attacker - 1
+            leave = np.where(left > 3, self.rng.integers(0, 2, g.size), 0)
+            defender = np.where(conquered, left - leave, defender)
+            attacker = np.where(conquered, 1 + leave, attacker)
+            self.troops[g, origin] = attacker
+            self.troops[g, destination] = defender
+            self.owners[g[conquered], destination[conquered]] = players[conquered]
+
+            award = conquered & ~got_card[active]
+            if award.any():
+                self.award_cards(g[award], players[award])
+            got_card[active] |= conquered
+
+            troops[rows, origin] = attacker
+            troops[rows, destination] = defender
+            own[conquered, destination[conquered]] = True
+            keep_going = (conquered & (attacker > 2)) | (own & (troops > 3)).any(axis=1)
+            active = active[keep_going]
+
+    def roll_battle(self, attacker: np.ndarray, defender: np.ndarray):
+        """Roll one battle per row, see Board.roll_attack_once.
+
+        Returns the attacker and defender troops afterwards, and a mask of
+        battles where the last defender was beaten. Conquered rows keep the
+        attacker troops from before the move.
+        """
+        n = attacker.size
+        attack_dice = self.rng.integers(1, 7, (n, 3))
+        defend_dice = self.rng.integers(1, 7, (n, 2))
+        return resolve_battles(attacker, defender, attack_dice, defend_dice)
+
+    def award_cards(self, games: np.ndarray, players: np.ndarray):
+        """Give each player a random card that is still in the deck."""
+        card = self.random_choice(self.cards[games] == 0)
+        has_card = card >= 0
+        self.cards[games[has_card], card[has_card]] = players[has_card]
+
+    def fortify(self, games: np.ndarray):
+        """Move troops from a random territory to a connected border territory."""
+        own = self.own_mask(games)
+        origin = self.random_choice(own & (self.troops[games] > 1))
+        valid = origin >= 0
+        games, own, origin = games[valid], own[valid], origin[valid]
+        if games.size == 0:
+            return
+        rows = np.arange(games.size)
+
+        # Territories reachable from the origin through own territories only
+        reach = np.zeros(own.shape, dtype=bool)
+        reach[rows, origin] = True
+        growing = rows
+        while growing.size:
+            frontier = reach[growing]
+            spread = frontier | own[growing] & (
+                (frontier.astype(np.float32) @ self.adjacency) > 0
+            )
+            changed = (spread != frontier).any(axis=1)
+            growing = growing[changed]
+            reach[growing] = spread[changed]
+
+        border = own & self.enemy_adjacent(games)
+        reach[rows, origin] = False
+        destination = self.random_choice(reach & border)
+        valid = destination >= 0
+        games, origin, destination, border, rows = (
+            x[valid] for x in (games, origin, destination, border, rows)
+        )
+        if games.size == 0:
+            return
+        rows = np.arange(games.size)
+
+        origin_troops = self.troops[games, origin]
+        lower = np.where(
+            ~border[rows, origin] & (origin_troops > 3), origin_troops - 2, 1
+        )
+        n_troops = lower + (
+            self.rng.random(games.size) * (origin_troops - lower)
+        ).astype(TROOPS_DTYPE)
+        self.troops[games, origin] -= n_troops
+        self.troops[games, destination] += n_troops
+        if self.analytics:
+            self.analytics.record_fortifies(origin, destination, n_troops)
+
+    def advance(self, games: np.ndarray) -> np.ndarray:
+        """Hand the turn to the next player alive and collect finished games."""
+        if games.size == 0:
+            return games
+        territories = np.stack(
+            [
+                (self.owners[games] == player).sum(axis=1)
+                for player in range(1, self.n_players + 1)
+            ],
+            axis=1,
+        )
+        alive = territories > 0
+        finished = alive.sum(axis=1) <= 1
+
+        current = self.current_player[games].astype(np.int32)
+        next_player = current.copy()
+        searching = ~finished
+        for offset in range(1, self.n_players + 1):
+            candidate = (current - 1 + offset) % self.n_players + 1
+            found = searching & alive[np.arange(games.size), candidate - 1]
+            next_player[found] = candidate[found]
+            searching &= ~found
+        self.game_turn[games] += (next_player <= current) & ~finished
+        self.current_player[games] = next_player
+
+        done = games[finished]
+        if done.size:
+            winner = (alive[finished].argmax(axis=1) + 1).astype(OWNER_DTYPE)
+            self.winner[done] = winner
+            self.done[done] = True
+            self.games_finished += done.size
+            np.add.at(self.wins, winner, 1)
+            if self.analytics:
+                self.analytics.games += done.size
+            self.finished_lengths.extend(self.game_turn[done].tolist())
+            for callback in self.finished_callbacks:
+                callback(done)
+            if self.auto_reset:
+                self.reset(done)
+        return done
@@ -0,0 +1,155 @@
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.compiled_map import CompiledMap, classic_map
+
+# Lower bounds of the troop buckets hashed per territory. Positions that only
+# differ inside a bucket share a hash on purpose, so e.g. 31 and 33 troops on a
+# back line territory are treated as the same position.
+TROOP_BUCKET_EDGES = (0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50)
+
+JOKERS = ("Joker1", "Joker2")
+
+
+class ZobristKeys:
+    """Random 64 bit keys for (territory, owner, troop bucket), cards and player."""
+
+    def __init__(
+        self,
+        compiled_map: CompiledMap,
+        n_players: int = 6,
+        seed: int = 0x5EED,
+        bucket_edges: Sequence[int] = TROOP_BUCKET_EDGES,
+    ):
+        rng = np.random.default_rng(seed)
+        n_owners = n_players + 1
+        self.bucket_edges = tuple(bucket_edges)
+        n_buckets = len(self.bucket_edges)
+
+        def draw(*shape) -> np.ndarray:
+            return rng.integers(0, 2**64, size=shape, dtype=np.uint64)
+
+        # Plain Python ints, XOR on numpy scalars is much slower
+        self.territory_keys: List[List[List[int]]] = draw(
+            compiled_map.n_territories, n_owners, n_buckets
+        ).tolist()
+        self.cards: List[str] = compiled_map.territories + list(JOKERS)
+        self.card_index: Dict[str, int] = {card: i for i, card in enumerate(self.cards)}
+        self.card_keys: List[List[int]] = draw(len(self.cards), n_owners).tolist()
+        self.player_keys: List[int] = draw(n_owners).tolist()
+
+        # Direct bucket lookup for the common small troop counts
+        self.bucket_lookup = [
+            max(bisect_right(self.bucket_edges, troops) - 1, 0)
+            for troops in range(self.bucket_edges[-1])
+        ]
+
+    def bucket(self, troops: int) -> int:
+        if troops < len(self.bucket_lookup):
+            return self.bucket_lookup[troops]
+        return len(self.bucket_edges) - 1
+
+    def territory_key(self, territory: int, owner: int, troops: int) -> int:
+        return self.territory_keys[territory][owner][self.bucket(troops)]
+
+    def card_key(self, card: str, owner: int) -> int:
+        return self.card_keys[self.card_index[card]][owner]
+
+    def full_hash(
+        self,
+        owners: Sequence[int],
+        troops: Sequence[int],
+        card_owners: Optional[Dict[str, int]] = None,
+        current_player: int = 0,
+    ) -> int:
+        """Hash a position from scratch; owners and troops are indexed by territory id."""
+        h = self.player_keys[current_player]
+        for territory, (owner, n_troops) in enumerate(zip(owners, troops)):
+            h ^= self.territory_key(territory, int(owner), int(n_troops))
+        for card, owner in (card_owners or {}).items():
+            h ^= self.card_key(card, owner)
+        return h
+
+
+@lru_cache(maxsize=None)
+def classic_zobrist() -> ZobristKeys:
+    """Keys for the classic map, identical in every process."""
+    return ZobristKeys(classic_map())
+
+
+class TranspositionTable:
+    """Fixed size hash table of position evaluations.
+
+    Slots are addressed by key % capacity. When two positions compete for a
+    slot the replacement policy decides which one is kept:
+
+    - "always": the newest entry wins.
+    - "depth": the entry searched deeper wins, ties go to the newest.
+    - a callable (stored_depth, new_depth) -> bool returning True to replace.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1 << 16,
+        replacement: Union[str, Callable[[int, int], bool]] = "depth",
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if replacement == "always":
+            self.should_replace = lambda stored_depth, new_depth: True
+        elif replacement == "depth":
+            self.should_replace = lambda stored_depth, new_depth: (
+                new_depth >= stored_depth
+            )
+        elif callable(replacement):
+            self.should_replace = replacement
+        else:
+            raise ValueError(f"Unknown replacement policy {replacement!r}")
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.keys: List[Optional[int]] = [None] * self.capacity
+        self.values: list = [None] * self.capacity
+        self.depths: List[int] = [0] * self.capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: int) -> bool:
+        return self.keys[key % self.capacity] == key
+
+    def probe(self, key: int, min_depth: int = 0, default=None):
+        """Return the value stored for key if it was searched at least min_depth."""
+        slot = key % self.capacity
+        if self.keys[slot] == key and self.depths[slot] >= min_depth:
+            self.hits += 1
+            return self.values[slot]
+        self.misses += 1
+        return default
+
+    def store(self, key: int, value, depth: int = 0) -> bool:
+        """Store a value, returning False when the policy kept the old entry."""
+        slot = key % self.capacity
+        stored_key = self.keys[slot]
+        if stored_key is None:
+            self.size += 1
+        elif not self.should_replace(self.depths[slot], depth):
+            return False
+        elif stored_key != key:
+            self.overwrites += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = depth
+        return True
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0